@@ -0,0 +1,73 @@
+# Event loop responsiveness while 50 passwords are hashed at once, with
+# bcrypt called on the loop (as hash_password used to) versus through
+# utils.password_hasher.
+#
+# Run from the repository root: python -m benchmarks.bench_bcrypt [rounds]
+
+import asyncio
+import sys
+import time
+
+import bcrypt
+
+from utils.password_hasher import PasswordHasher
+
+HASHES = 50
+TICK = 0.01  # seconds
+
+
+async def measure_lag(work) -> tuple[float, float, int]:
+    # a task that wants to run every TICK seconds, like the bot's
+    # heartbeat and message handlers do, records how late it wakes up;
+    # a responsive loop gets through about elapsed / TICK ticks
+    lags = []
+    done = False
+
+    async def ticker():
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK)
+
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+
+    done = True
+    await task
+    return elapsed, max(lags), len(lags)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    password = b'5f4dcc3b5aa765d61d8327deb882cf99'
+
+    async def on_loop():
+        async def hash_one():
+            bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+        await asyncio.gather(*(hash_one() for _ in range(HASHES)))
+
+    async def pooled(workers):
+        hasher = PasswordHasher(workers, rounds, max_queue=HASHES)
+        await asyncio.gather(*(hasher.hash(password) for _ in range(HASHES)))
+        hasher.shutdown()
+
+    print(f'{HASHES} hashes, cost {rounds}'
+          f'{"total":>14s}{"max lag":>12s}{"ticks":>8s}')
+    for name, work in [
+        ('on the event loop', on_loop),
+        ('PasswordHasher, 1 thread', lambda: pooled(1)),
+        ('PasswordHasher, 2 threads', lambda: pooled(2)),
+        ('PasswordHasher, 4 threads', lambda: pooled(4)),
+    ]:
+        elapsed, max_lag, ticks = asyncio.run(measure_lag(work))
+        print(f'{name:27s}{elapsed:10.2f} s'
+              f'{max_lag * 1e3:9.1f} ms{ticks:8d}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+# Profile and score lookups through the HTTP API versus the
+# direct database read path in utils.gfg_db.
+#
+# MySQL isn't needed: the gfg_db queries run against an in-memory SQLite
+# copy of the server's schema (indexes included). The API is stood in for
+# by a local aiohttp server that runs the same queries and returns their
+# results as JSON, like the real one. Neither side crosses a real network,
+# so the API numbers are a lower bound.
+#
+# Run from the repository root: python -m benchmarks.bench_db_reads
+
+import asyncio
+import json
+import random
+import sqlite3
+import time
+
+import aiohttp
+from aiohttp import web
+
+from utils.gfg_api import ScoreBatch, User
+from utils.gfg_db import MAP_COLUMNS, SCOPES, SCORES_QUERY, STATS_QUERY
+from utils.gfg_db import USER_QUERY
+
+USERS = 500
+SCORES_PER_USER = 200
+MAPS = 5000
+MODES = (0, 1, 2, 3, 4, 5, 6, 8)
+
+SCHEMA = '''
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY, name TEXT, safe_name TEXT UNIQUE, priv INTEGER,
+    clan_id INTEGER, country TEXT, silence_end INTEGER, donor_end INTEGER,
+    creation_time INTEGER, latest_activity INTEGER
+);
+CREATE TABLE stats (
+    id INTEGER, mode INTEGER, tscore INTEGER, rscore INTEGER, pp INTEGER,
+    plays INTEGER, playtime INTEGER, acc REAL, max_combo INTEGER,
+    total_hits INTEGER, replay_views INTEGER, xh_count INTEGER,
+    x_count INTEGER, sh_count INTEGER, s_count INTEGER, a_count INTEGER,
+    PRIMARY KEY (id, mode)
+);
+CREATE INDEX stats_mode_pp ON stats (mode, pp);
+CREATE TABLE maps (
+    id INTEGER PRIMARY KEY, set_id INTEGER, md5 TEXT UNIQUE, artist TEXT,
+    title TEXT, version TEXT, creator TEXT, last_update TEXT,
+    total_length INTEGER, max_combo INTEGER, status INTEGER, plays INTEGER,
+    passes INTEGER, mode INTEGER, bpm REAL, cs REAL, od REAL, ar REAL,
+    hp REAL, diff REAL
+);
+CREATE TABLE scores (
+    id INTEGER PRIMARY KEY, map_md5 TEXT, score INTEGER, pp REAL, acc REAL,
+    max_combo INTEGER, mods INTEGER, n300 INTEGER, n100 INTEGER,
+    n50 INTEGER, nmiss INTEGER, grade TEXT, status INTEGER, mode INTEGER,
+    play_time TEXT, time_elapsed INTEGER, userid INTEGER, perfect INTEGER
+);
+CREATE INDEX scores_userid ON scores (userid, mode);
+'''
+
+
+def to_sqlite(query: str) -> str:
+    # the gfg_db queries are written for MySQL
+    return query.replace('%s', '?')
+
+
+def make_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+
+    conn.executemany(
+        'INSERT INTO users VALUES (?, ?, ?, 3, 0, ?, 0, 0, 0, 0)',
+        [(i, f'player {i}', f'player_{i}', random.choice(['ca', 'us']))
+         for i in range(1, USERS + 1)]
+    )
+    conn.executemany(
+        'INSERT INTO stats VALUES '
+        '(?, ?, 0, 0, ?, 0, 0, 98.0, 0, 0, 0, 0, 0, 0, 0, 0)',
+        [(i, mode, random.randint(0, 10000))
+         for i in range(1, USERS + 1) for mode in MODES]
+    )
+    conn.executemany(
+        'INSERT INTO maps VALUES (?, ?, ?, "Artist", "Title", "Insane", '
+        '"Mapper", "2020-01-01 00:00:00", 200, 1000, 2, 10, 5, 0, 180, 4, '
+        '8, 9.3, 5, 5.67)',
+        [(i, i, f'{i:032x}') for i in range(1, MAPS + 1)]
+    )
+    conn.executemany(
+        'INSERT INTO scores VALUES (NULL, ?, 1234567, ?, 98.76, 727, 72, '
+        '1000, 20, 1, 0, "S", 2, 0, "2023-06-01 12:34:56", 123456, ?, 0)',
+        [(f'{random.randint(1, MAPS):032x}', random.uniform(0, 500), i)
+         for i in range(1, USERS + 1) for _ in range(SCORES_PER_USER)]
+    )
+    conn.commit()
+    return conn
+
+
+def db_player_info(conn: sqlite3.Connection, name: str) -> dict:
+    # what gfg_db.fetch_player_info does
+    info = dict(conn.execute(
+        to_sqlite(USER_QUERY.format('safe_name')), [name]
+    ).fetchone())
+    stats = conn.execute(
+        to_sqlite(STATS_QUERY), [0, 0, info['country'], info['id']]
+    ).fetchall()
+
+    return {'player': {
+        'info': info,
+        'stats': {str(row['mode']): dict(row) for row in stats}
+    }}
+
+
+def db_player_scores(conn: sqlite3.Connection,
+                     name: str,
+                     limit: int) -> list[dict]:
+    # what gfg_db.fetch_player_scores does
+    rows = [dict(row) for row in conn.execute(
+        to_sqlite(SCORES_QUERY.format(
+            '(SELECT id FROM users WHERE safe_name = ?)', SCOPES['best']
+        )),
+        [name, 0, limit]
+    )]
+    for row in rows:
+        row['beatmap'] = {c: row.pop(f'map_{c}') for c in MAP_COLUMNS}
+
+    return rows
+
+
+def db_profile(conn: sqlite3.Connection, name: str) -> User:
+    json_ = db_player_info(conn, name)
+    player = User(json_['player']['info'])
+    player.all_stats = json_['player']['stats']
+    return player
+
+
+def db_scores(conn: sqlite3.Connection, name: str, limit: int) -> ScoreBatch:
+    return ScoreBatch(db_player_scores(conn, name, limit))
+
+
+async def api_profile(session: aiohttp.ClientSession,
+                      url: str,
+                      name: str) -> User:
+    async with session.get(url + 'get_player_info',
+                           params={'name': name}) as r:
+        json_ = await r.json()
+
+    player = User(json_['player']['info'])
+    player.all_stats = json_['player']['stats']
+    return player
+
+
+async def api_scores(session: aiohttp.ClientSession,
+                     url: str,
+                     name: str,
+                     limit: int) -> ScoreBatch:
+    async with session.get(url + 'get_player_scores',
+                           params={'name': name, 'limit': limit}) as r:
+        return ScoreBatch((await r.json())['scores'])
+
+
+async def bench_api(conn: sqlite3.Connection,
+                    lookups: dict,
+                    names: list[str]) -> dict[str, float]:
+    # like the real server, run the same queries and send the result as JSON
+    async def get_player_info(request):
+        return web.json_response(
+            db_player_info(conn, request.query['name']),
+            dumps=lambda obj: json.dumps(obj, default=str)
+        )
+
+    async def get_player_scores(request):
+        return web.json_response(
+            {'scores': db_player_scores(conn, request.query['name'],
+                                        int(request.query['limit']))},
+            dumps=lambda obj: json.dumps(obj, default=str)
+        )
+
+    app = web.Application()
+    app.router.add_get('/get_player_info', get_player_info)
+    app.router.add_get('/get_player_scores', get_player_scores)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f'http://127.0.0.1:{port}/'
+
+    results = {}
+    async with aiohttp.ClientSession() as session:
+        await api_profile(session, url, names[0])  # warm up the connection
+
+        for lookup_name, lookup in lookups.items():
+            start = time.perf_counter()
+            for name in names:
+                await lookup(session, url, name)
+            results[lookup_name] = (time.perf_counter() - start) / len(names)
+
+    await runner.cleanup()
+    return results
+
+
+def main():
+    number = 500
+    names = [f'player_{random.randint(1, USERS)}' for _ in range(number)]
+    conn = make_db()
+
+    db_lookups = {
+        'profile': lambda name: db_profile(conn, name),
+        'first page (15 scores)': lambda name: db_scores(conn, name, 15),
+        'top 100 scores': lambda name: db_scores(conn, name, 100)
+    }
+    db_results = {}
+    for lookup_name, lookup in db_lookups.items():
+        start = time.perf_counter()
+        for name in names:
+            lookup(name)
+        db_results[lookup_name] = (time.perf_counter() - start) / number
+
+    api_results = asyncio.run(bench_api(conn, {
+        'profile': api_profile,
+        'first page (15 scores)':
+            lambda s, url, name: api_scores(s, url, name, 15),
+        'top 100 scores':
+            lambda s, url, name: api_scores(s, url, name, 100)
+    }, names))
+
+    print(f'{"per lookup":24s}{"HTTP API":>12s}{"database":>12s}')
+    for lookup_name in db_lookups:
+        print(f'{lookup_name:24s}'
+              f'{api_results[lookup_name] * 1e3:9.2f} ms'
+              f'{db_results[lookup_name] * 1e3:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
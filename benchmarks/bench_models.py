@@ -0,0 +1,111 @@
+# Construction time and memory of the gfg_api models for a 100-score
+# response, compared with the old eagerly-parsed models.
+#
+# Run from the repository root: python -m benchmarks.bench_models
+
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from ossapi import Mod
+
+from utils.gfg_api import Score, ScoreBatch
+
+
+def make_scores_json(n: int = 100) -> list[dict]:
+    return [
+        {
+            'id': 1000 + i, 'score': 1_234_567, 'pp': 321.5 - i,
+            'acc': 98.76, 'max_combo': 727, 'mods': 72, 'n300': 1000,
+            'n100': 20, 'n50': 1, 'nmiss': 0, 'grade': 'S', 'status': 2,
+            'mode': 0, 'play_time': '2023-06-01T12:34:56', 'perfect': 0,
+            'time_elapsed': 123456,
+            'beatmap': {
+                'md5': 'd41d8cd98f00b204e9800998ecf8427e', 'id': 2000 + i,
+                'set_id': 3000 + i, 'artist': 'Artist', 'title': 'Title',
+                'version': 'Insane', 'creator': 'Mapper',
+                'last_update': '2020-01-01T00:00:00', 'total_length': 200,
+                'max_combo': 1000, 'status': 2, 'plays': 10, 'passes': 5,
+                'mode': 0, 'bpm': 180.0, 'cs': 4.0, 'od': 8.0, 'ar': 9.3,
+                'hp': 5.0, 'diff': 5.67
+            }
+        }
+        for i in range(n)
+    ]
+
+
+class EagerBeatmap:
+    # gfg_api.Beatmap before lazy parsing
+    def __init__(self, data):
+        self.md5 = data['md5']
+        self.diff_id = data['id']
+        self.set_id = data['set_id']
+        self.artist = data['artist']
+        self.title = data['title']
+        self.difficulty = data['version']
+        self.creator = data['creator']
+        self.last_update = datetime.fromisoformat(
+            data['last_update'] + '+00:00'
+        )
+        self.length = data['total_length']
+        self.max_combo = data['max_combo']
+        self.status = data['status']
+        self.plays = data['plays']
+        self.passes = data['passes']
+        self.mode = data['mode']
+        self.bpm = data['bpm']
+        self.cs = data['cs']
+        self.od = data['od']
+        self.ar = data['ar']
+        self.hp = data['hp']
+        self.star_rating = data['diff']
+
+
+class EagerScore:
+    # gfg_api.Score before lazy parsing
+    def __init__(self, data):
+        self.id = data['id']
+        self.score = data['score']
+        self.pp = data['pp']
+        self.acc = data['acc']
+        self.max_combo = data['max_combo']
+        self.mods = Mod(data['mods'])
+        self.n300 = data['n300']
+        self.n100 = data['n100']
+        self.n50 = data['n50']
+        self.nmiss = data['nmiss']
+        self.grade = data['grade']
+        self.status = data['status']
+        self.mode = data['mode']
+        self.play_time = datetime.fromisoformat(data['play_time'] + '+00:00')
+        self.perfect = bool(data['perfect'])
+        self.beatmap = EagerBeatmap(data['beatmap'])
+        self.time_elapsed = data['time_elapsed']
+
+
+def measure(name: str, build, number: int = 200) -> None:
+    seconds = min(timeit.repeat(build, number=number, repeat=5)) / number
+
+    tracemalloc.start()
+    result = build()  # noqa: F841 (keep it alive while measuring)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{name:28s}{seconds * 1e6:10.1f} µs{allocated / 1024:10.1f} KiB')
+
+
+def main():
+    data = make_scores_json()
+
+    print(f'{"100 scores":28s}{"build":>13s}{"memory":>14s}')
+    measure('eager Score list', lambda: [EagerScore(s) for s in data])
+    measure('lazy Score list', lambda: [Score(s) for s in data])
+    measure('ScoreBatch', lambda: ScoreBatch(data))
+    # keep the batch as well as the rows read, since the rows need it
+    measure('ScoreBatch + 5 rows read',
+            lambda: (b := ScoreBatch(data),
+                     [s.beatmap.title for s in b[:5]]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import discord
+from discord.ext import commands
+import asyncio
+import pymysql
+
+import os
+from env import BOT_TEST_SERVER, GFG_SERVER
+from jsons import flush_json
+from utils.storage import storage
+from utils.gfg_api import client as gfg_client
+from utils.db import db
+from utils.difficulty_cache import difficulty_cache
+from utils.difficulty_engine import difficulty_engine
+from utils.password_hasher import password_hasher
+from utils.media import media
+from utils.router import router
+from utils.member_index import member_indexes
+from utils.tag_usage import tag_usage
+
+
+class Bot(commands.Bot):
+    def __init__(self):
+
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.members = True
+        super().__init__(command_prefix='b!',
+                         intents=intents,
+                         help_command=None)
+
+        router.on_command = self.process_commands
+        asyncio.run(self.load_cogs())
+
+        self.synced = False
+
+    async def setup_hook(self):
+        await gfg_client.open()
+
+        try:  # connect ahead of the first command that needs the database
+            await db.open()
+        except (pymysql.err.MySQLError, OSError) as e:
+            print(f'Could not connect to the osu!Goldfish database: {e}')
+
+        # build the tag search index now rather than in the first
+        # autocomplete, which Discord only waits 3 seconds for
+        router.tag_index()
+
+    async def load_cogs(self):
+        for filename in os.listdir('./cogs'):
+            if filename.endswith('.py'):
+                await self.load_extension(f'cogs.{filename[:-3]}')
+
+    async def on_ready(self):
+        await self.wait_until_ready()
+
+        if not self.synced:
+            # await self.tree.sync()
+            await self.tree.sync(
+                guild=discord.Object(id=BOT_TEST_SERVER))
+            await self.tree.sync(
+                guild=discord.Object(id=GFG_SERVER))
+            self.synced = True
+
+        print(f'Logged in as {self.user}')
+
+    async def on_message(self, message: discord.Message):
+        # the one place every message goes through (see utils.router)
+        if message.author == self.user:
+            return
+        await router.route(message)
+
+    async def on_raw_message_delete(self,
+                                    payload: discord.RawMessageDeleteEvent):
+        # links to an attachment in a deleted message stop working
+        media.forget_message(payload.message_id)
+
+    # keep the member name indexes (see utils.member_index) up to date
+    async def on_member_join(self, member: discord.Member):
+        member_indexes.on_member_join(member)
+
+    async def on_member_remove(self, member: discord.Member):
+        member_indexes.on_member_remove(member)
+
+    async def on_member_update(self,
+                               before: discord.Member,
+                               after: discord.Member):
+        member_indexes.on_member_update(after)
+
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        member_indexes.on_user_update(after)
+
+    async def close(self):
+        await super().close()
+        tag_usage.flush()
+        await flush_json()  # don't lose writes still in the coalescing window
+        storage.close()
+        await gfg_client.close()
+        await db.close()
+        difficulty_engine.shutdown()
+        password_hasher.shutdown()
+        difficulty_cache.close()
@@ -3,6 +3,30 @@ from discord.ext import commands
 from discord import app_commands
 
 from env import BOT_TEST_SERVER, GFG_SERVER
+from cogs.osu import osu_backend
+from utils import pipeline
+from utils.blob_store import blobs
+from utils.db import db
+from utils.difficulty_cache import difficulty_cache
+from utils.gfg_api import cache as gfg_cache, client as gfg_client
+from utils.media import media
+from utils.paginator import Paginator, reply_paginator
+from utils.password_hasher import password_hasher
+from utils.router import router
+from utils.tag_usage import tag_usage
+
+
+def format_stats(stats: dict, prefix: str = '') -> list[str]:
+    """Return a 'key: value' line for each of <stats>, flattened."""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            lines.extend(format_stats(value, f'{prefix}{key}.'))
+        elif isinstance(value, float):
+            lines.append(f'{prefix}{key}: {value:.4g}')
+        else:
+            lines.append(f'{prefix}{key}: {value}')
+    return lines
 
 
 class Admin(commands.Cog):
@@ -38,6 +62,40 @@ class Admin(commands.Cog):
         if ctx.interaction:
             await ctx.interaction.followup.send(f'Purged {amount} message(s).')
 
+    @commands.hybrid_command(
+        name='stats',
+        description="View the bot's caches, pools and latencies."
+    )
+    @commands.has_permissions(administrator=True)
+    @app_commands.guilds(BOT_TEST_SERVER, GFG_SERVER)
+    async def stats(self, ctx: commands.Context):
+        # latencies and durations are in seconds
+        sections = {
+            'Message router': router.stats(),
+            'osu!Goldfish API': gfg_client.stats(),
+            'osu!Goldfish API cache': gfg_cache.stats(),
+            'osu! API': osu_backend.stats(),
+            'MySQL pool': db.stats(),
+            'Command pipelines': pipeline.stats(),
+            'Difficulty cache': difficulty_cache.stats(),
+            'Password hasher': password_hasher.stats(),
+            'Media uploads': media.stats(),
+            'Tag attachments': blobs.stats(),
+            'Tag usage': tag_usage.stats()
+        }
+
+        pages: list[discord.Embed] = []
+
+        for title, stats in sections.items():
+            text = '\n'.join(format_stats(stats)) or '(nothing yet)'
+            pages.append(discord.Embed(
+                title=title,
+                description=f'```\n{text[:4000]}\n```',
+                colour=discord.Colour.from_rgb(181, 142, 101)
+            ))
+
+        await reply_paginator(paginator=Paginator(pages=pages), ctx=ctx)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Admin(bot),
@@ -2,11 +2,11 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-from jsons import read_json, write_json
 from env import BOT_TEST_SERVER, GFG_SERVER, GFG_GOLDFISH_EMOTE
 
 from utils.paginator import Paginator, reply_paginator
 from utils.member_conv import MemberConv
+from utils.storage import storage
 
 
 class Autism(commands.Cog):
@@ -21,25 +21,14 @@ class Autism(commands.Cog):
     )
     @app_commands.guilds(BOT_TEST_SERVER, GFG_SERVER)
     async def autismlb(self, ctx: commands.Context):
-        lb = read_json('autismlb.json')
-
-        # sort by score in descending order
-        descending_lb = sorted(
-            lb.items(),
-            key=lambda x: int(x[0]),
-            reverse=True
-        )
-
-        # unpack each user from <score:users> into its own pair
+        # (score, username) pairs in descending order of score
         unpacked: list[tuple[str, str]] = []
-        for pair in descending_lb:
-            score = pair[0]
-            for user_id in pair[1]:
-                user = self.bot.get_user(user_id)
-                if not user:
-                    continue
+        for score, user_id in storage.autism_scores():
+            user = self.bot.get_user(user_id)
+            if not user:
+                continue
 
-                unpacked.append((score, user.global_name))
+            unpacked.append((score, user.global_name))
 
         lines = [  # each line of the leaderboard
             '{:6s}{:7s}{}'.format(
@@ -96,20 +85,7 @@ class Autism(commands.Cog):
             await ctx.reply('User not found.')
             return
 
-        lb = read_json('autismlb.json')
-
-        # check if <user> is already ranked
-        is_update = False
-        for key in lb:
-            if user.id in lb[key]:
-                is_update = True
-                lb[key].remove(user.id)
-                break
-
-        lb[score] = lb.get(score, []) + [user.id]
-        write_json('autismlb.json', lb)
-
-        if is_update:
+        if storage.set_autism_score(user.id, score):
             await ctx.reply(f'Updated ``{str(user)}`` to a score of '
                             f'``{score}`` in the rankings.')
         else:
@@ -132,16 +108,10 @@ class Autism(commands.Cog):
             await ctx.reply('User not found.')
             return
 
-        lb = read_json('autismlb.json')
-        for key in lb:
-            if user.id in lb[key]:
-                lb[key].remove(user.id)
-                write_json('autismlb.json', lb)
-
-                await ctx.reply(f'Removed ``{str(user)}`` from the rankings.')
-                return
-
-        await ctx.reply('User is not on the rankings.')
+        if storage.delete_autism_score(user.id):
+            await ctx.reply(f'Removed ``{str(user)}`` from the rankings.')
+        else:
+            await ctx.reply('User is not on the rankings.')
 
 
 async def setup(bot: commands.Bot):
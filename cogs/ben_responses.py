@@ -2,10 +2,10 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-import os
-import random
-from jsons import read_json, write_json
 from env import BOT_TEST_SERVER, GFG_SERVER
+from utils.router import router
+from utils.assets import assets
+from utils.media import media
 
 
 class BenResponses(commands.Cog):
@@ -13,22 +13,15 @@ class BenResponses(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        assets.preload('ben_responses')
+        router.on_question = self.respond
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
+    async def respond(self, message: discord.Message):
         """
-        Respond to messages ending with a question mark if the channel
-        has Ben responses enabled.
+        Respond to a message ending with a question mark in a channel
+        with Ben responses enabled (see utils.router).
         """
-        if not message.content.endswith('?'):
-            return
-
-        config = read_json('config.json')
-
-        if message.channel.id in config['response_channels']:
-            responses = [discord.File(f'./assets/ben_responses/{filename}')
-                         for filename in os.listdir('./assets/ben_responses')]
-            await message.reply(file=random.choice(responses))
+        await media.send(message.reply, assets.choice('ben_responses'))
 
     @commands.hybrid_command(
         name='toggleresponses',
@@ -37,17 +30,12 @@ class BenResponses(commands.Cog):
     @commands.has_permissions(administrator=True)
     @app_commands.guilds(BOT_TEST_SERVER, GFG_SERVER)
     async def toggleresponses(self, ctx: commands.Context):
-        config = read_json('config.json')
         id_ = ctx.channel.id
 
-        if id_ in config['response_channels']:
-            config['response_channels'].remove(id_)
-            await ctx.reply(f'Toggled off Ben responses for <#{id_}>')
-        else:
-            config['response_channels'].append(id_)
+        if router.toggle_response_channel(id_):
             await ctx.reply(f'Toggled on Ben responses for <#{id_}>')
-
-        write_json('config.json', config)
+        else:
+            await ctx.reply(f'Toggled off Ben responses for <#{id_}>')
 
 
 async def setup(bot: commands.Bot):
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 
 from env import BOT_TEST_SERVER, GFG_SERVER
+from utils.resilience import BackendUnavailable
 
 
 class ErrorHandler(commands.Cog):
@@ -16,6 +17,19 @@ class ErrorHandler(commands.Cog):
                                error: commands.CommandError):
         if isinstance(error, commands.errors.CommandNotFound):
             return
+
+        # find the exception the command raised (hybrid commands wrap it twice)
+        original = error
+        while hasattr(original, 'original'):
+            original = original.original
+
+        if isinstance(original, BackendUnavailable):
+            await ctx.reply(
+                f'{original.backend} is having trouble right now, try again '
+                f'in {max(1, round(original.retry_after))} seconds.'
+            )
+            return
+
         await ctx.reply(error)
 
 
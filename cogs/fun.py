@@ -3,6 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 
 from env import BOT_TEST_SERVER, GFG_SERVER, GFG_NSFW_ID
+from utils.media import media
 
 from datetime import datetime
 import pytz
@@ -27,18 +28,17 @@ class Fun(commands.Cog):
             )
             return
 
-        nerd = discord.File('assets/nerd.mp4')
-
         if ctx.message.reference:
             r = await ctx.channel.fetch_message(
                 ctx.message.reference.message_id
             )
-            await r.reply(
-                file=nerd,
+            await media.send(
+                r.reply,
+                'nerd.mp4',
                 mention_author=False
             )
         else:
-            await ctx.channel.send(file=nerd)
+            await media.send(ctx.channel.send, 'nerd.mp4')
 
         await ctx.message.delete(delay=0.5)
 
@@ -66,7 +66,7 @@ class Fun(commands.Cog):
             await ctx.reply(f'<#{GFG_NSFW_ID}>')
             return
 
-        await ctx.channel.send(file=discord.File('assets/ballout.png'))
+        await media.send(ctx.channel.send, 'ballout.png')
 
 
 async def setup(bot: commands.Bot):
@@ -4,7 +4,6 @@ from discord import app_commands
 
 from typing import Optional
 from env import BOT_TEST_SERVER, GFG_SERVER, OSU_CLIENT_ID, OSU_CLIENT_SECRET
-from jsons import read_json
 
 from utils.paginator import Paginator, reply_paginator
 from utils.account_registration import AccountRegistration
@@ -16,10 +15,15 @@ from utils.osu_utils import (
     process_best_scores,
     process_name_change
 )
-from utils.gfg_server_accs import find_user
+from utils.gfg_server_accs import server_accs
+from utils.resilience import Backend
 from ossapi import OssapiAsync
 
 
+# the osu! API asks for no more than 60 requests per minute
+osu_backend = Backend('osu!', rate=1, burst=10)
+
+
 class Osu(commands.Cog):
     """osu!."""
 
@@ -43,7 +47,9 @@ class Osu(commands.Cog):
         await ctx.defer()
 
         try:
-            user = await self._osu_api().user(username)
+            user = await osu_backend.call(
+                lambda: self._osu_api().user(username)
+            )
         except ValueError:
             await ctx.reply('User not found.')
             return
@@ -88,10 +94,8 @@ class Osu(commands.Cog):
     )
     @app_commands.guilds(BOT_TEST_SERVER, GFG_SERVER)
     async def register(self, interaction: discord.Interaction):
-        server_accs = read_json('server_accs.json')
-
         try:
-            username = find_user(server_accs, interaction.user.id)
+            username = server_accs.find_user(interaction.user.id)
             await interaction.response.send_message(
                 f'You are registered on osu!Goldfish as **{username}**.',
                 ephemeral=True
@@ -139,10 +143,8 @@ class Osu(commands.Cog):
     )
     @app_commands.guilds(BOT_TEST_SERVER, GFG_SERVER)
     async def changepw(self, interaction: discord.Interaction):
-        server_accs = read_json('server_accs.json')
-
         try:
-            user_safe_name = find_user(server_accs, interaction.user.id)
+            user_safe_name = server_accs.find_user(interaction.user.id)
             await interaction.response.send_modal(
                 PasswordChanger(user_safe_name)
             )
@@ -161,10 +163,8 @@ class Osu(commands.Cog):
     async def changeflag(self,
                          interaction: discord.Interaction,
                          country_code: str):
-        server_accs = read_json('server_accs.json')
-
         try:
-            user_safe_name = find_user(server_accs, interaction.user.id)
+            user_safe_name = server_accs.find_user(interaction.user.id)
             await process_flag_change(
                 interaction=interaction,
                 user_safe_name=user_safe_name,
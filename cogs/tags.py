@@ -3,12 +3,15 @@ from discord.ext import commands
 from discord import app_commands
 from discord.app_commands import Choice
 
-import os
-from jsons import read_json, write_json
+import aiohttp
 from env import BOT_TEST_SERVER, GFG_SERVER
 from typing import Optional
 
+from utils.blob_store import BlobTooLarge, blobs
 from utils.paginator import Paginator, reply_paginator
+from utils.media import media
+from utils.router import router
+from utils.tag_usage import tag_usage
 
 
 class Tags(commands.Cog):
@@ -16,24 +19,27 @@ class Tags(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        router.on_tag = self.send_tag
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """View a tag."""
-        if not (message.content.startswith('b!') and
-                message.author != self.bot.user):
-            return
+    async def cog_load(self):
+        # count which attachments are in use (see /tag cleanup)
+        blobs.load_refs(tag['filename'] for _, tag in router.tags()
+                        if 'filename' in tag)
 
-        tags = read_json('tags.json')
-        check = message.content.split('b!', 1)[1]
+    async def send_tag(self,
+                       message: discord.Message,
+                       name: str,
+                       tag: dict):
+        """View a tag (see utils.router)."""
+        tag_usage.record(name)
 
-        if check in tags:
-            if 'message' in tags[check]:
-                await message.channel.send(tags[check]['message'])
-            else:  # it's an attachment tag
-                filename = tags[check]['filename']
-                file = discord.File(f'./assets/tags/{filename}')
-                await message.channel.send(file=file)
+        if 'message' in tag:
+            await message.channel.send(tag['message'])
+        else:  # it's an attachment tag
+            filename = tag['filename']
+            # stored tags aren't kept in memory; the name is the digest
+            await media.send(message.channel.send, f'tags/{filename}',
+                             digest=blobs.digest(filename))
 
     @commands.hybrid_group(name='tag', aliases=['t'])
     @app_commands.guilds(BOT_TEST_SERVER, GFG_SERVER)
@@ -67,9 +73,7 @@ class Tags(commands.Cog):
             )
             return
 
-        tags = read_json('tags.json')
-
-        if tag_name in tags:
+        if router.get_tag(tag_name):
             await ctx.interaction.response.send_message(
                 'That tag already exists!',
                 ephemeral=True
@@ -83,18 +87,28 @@ class Tags(commands.Cog):
             return
 
         if attachment:
-            file_extension = attachment.filename.rsplit('.', 1)[1]
-            new_filename = tag_name + '.' + file_extension
+            if attachment.size > blobs.max_size:
+                await ctx.interaction.response.send_message(
+                    ('Attachments can be at most '
+                     f'{blobs.max_size // (1024 * 1024)} MB.'),
+                    ephemeral=True
+                )
+                return
+
+            await ctx.defer()  # the download might take a while
 
-            tags[tag_name] = {'filename': new_filename}
-            await attachment.save(f'./assets/tags/{new_filename}')
+            try:
+                filename = await blobs.save(attachment.url,
+                                            attachment.filename)
+            except (BlobTooLarge, aiohttp.ClientError):
+                await ctx.send('Could not save that attachment.')
+                return
+
+            router.add_tag(tag_name, {'filename': filename})
         else:
-            tags[tag_name] = {'message': message}
+            router.add_tag(tag_name, {'message': message})
 
-        write_json('tags.json', tags)
-        await ctx.interaction.response.send_message(
-            f'Successfully tagged as ``{tag_name}``.'
-        )
+        await ctx.send(f'Successfully tagged as ``{tag_name}``.')
 
     @tag.command(
         name='delete',
@@ -102,29 +116,103 @@ class Tags(commands.Cog):
         description='Delete a tag.'
     )
     @commands.has_permissions(administrator=True)
+    @app_commands.describe(tag_name='Start typing to search for a tag.')
     async def delete(self, ctx: commands.Context, tag_name: str):
-        tags = read_json('tags.json')
+        tag = router.delete_tag(tag_name)
 
-        if tag_name not in tags:
+        if not tag:
             await ctx.reply('That tag does not exist!')
             return
 
-        if 'filename' in tags[tag_name]:
-            os.remove(f"./assets/tags/{tags[tag_name]['filename']}")
-
-        tags.pop(tag_name)
-        write_json('tags.json', tags)
+        if 'filename' in tag:
+            blobs.release(tag['filename'])
+        tag_usage.forget(tag_name)
 
         await ctx.reply(f'Deleted tag ``{tag_name}``.')
 
+    @tag.command(
+        name='cleanup',
+        description='Move attachment files that no tag uses out of the way.'
+    )
+    @commands.has_permissions(administrator=True)
+    async def cleanup(self, ctx: commands.Context):
+        collected = blobs.collect()
+
+        if not collected:
+            await ctx.reply('There was nothing to clean up.')
+            return
+
+        await ctx.reply(f'Cleaned up {len(collected)} file(s); unused '
+                        f'attachments were moved to ``{blobs.quarantine}``.')
+
+    @delete.autocomplete('tag_name')
+    async def tag_name_autocomplete(self,
+                                    interaction: discord.Interaction,
+                                    current: str) -> list[Choice[str]]:
+        return [
+            Choice(name=name, value=name)
+            for name in router.tag_index().complete(current)
+        ]
+
+    @tag.command(
+        name='search',
+        description='Search tag names and messages.'
+    )
+    async def search(self, ctx: commands.Context, *, query: str):
+        names = router.tag_index().search(query, limit=50)
+
+        if not names:
+            await ctx.reply(f'No tags found for ``{query}``.')
+            return
+
+        lines = ['b!' + name for name in names]
+
+        pages: list[discord.Embed] = []
+
+        for i in range(0, len(lines), 10):
+            em = discord.Embed(
+                title=f'Tags matching "{query}"',
+                description='\n'.join(lines[i:i+10]),
+                colour=discord.Colour.from_rgb(181, 142, 101)
+            )
+            em.set_thumbnail(url=ctx.guild.icon.url)
+
+            pages.append(em)
+
+        await reply_paginator(paginator=Paginator(pages=pages), ctx=ctx)
+
+    @tag.command(name='stats', description='View the most used tags.')
+    async def stats(self, ctx: commands.Context):
+        most_used = tag_usage.most_used(10)
+
+        if not most_used:
+            await ctx.reply('No tags have been used yet!')
+            return
+
+        lines = []
+        for i, (name, uses) in enumerate(most_used, start=1):
+            last_used = int(tag_usage.last_used(name))
+            lines.append(f'**{i}.** b!{name} - {uses:,} uses '
+                         f'(last used <t:{last_used}:R>)')
+
+        em = discord.Embed(
+            title='Most used tags',
+            description='\n'.join(lines),
+            colour=discord.Colour.from_rgb(181, 142, 101)
+        )
+        em.set_thumbnail(url=ctx.guild.icon.url)
+
+        await ctx.reply(embed=em)
+
     @tag.command(name='list', description="View this server's tags.")
     @app_commands.describe(sort='Default sort: Date added (newest first)')
     @app_commands.choices(sort=[
         Choice(name='Alphabetical', value=1),
-        Choice(name='Date added (oldest first)', value=2)
+        Choice(name='Date added (oldest first)', value=2),
+        Choice(name='Most used', value=3)
     ])
     async def list(self, ctx: commands.Context, sort: Choice[int] = None):
-        tags = read_json('tags.json')
+        tags = dict(router.tags())
 
         if not sort:  # default sort
             tags = dict(list(tags.items())[::-1])
@@ -132,6 +220,11 @@ class Tags(commands.Cog):
         elif sort.value == 1:
             tags = dict(sorted(tags.items()))
             sort_type = sort.name
+        elif sort.value == 3:
+            # ties stay oldest first
+            tags = dict(sorted(tags.items(),
+                               key=lambda item: -tag_usage.uses(item[0])))
+            sort_type = sort.name
         else:
             # <tags> is already sorted by oldest first
             sort_type = sort.name
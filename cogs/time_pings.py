@@ -2,9 +2,9 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 
-from jsons import read_json, write_json
 from env import BOT_TEST_SERVER, GFG_SERVER, GFG_GENERAL_ID
 from utils.member_conv import MemberConv
+from utils.storage import storage
 import datetime
 import pytz
 
@@ -38,23 +38,31 @@ class TimePings(commands.Cog):
             await ctx.reply('User not found.')
             return
 
-        config = read_json('config.json')
+        time_muted = storage.time_muted()
 
-        if ctx.author.id in config['time_muted']:
+        if ctx.author.id in time_muted:
             await ctx.reply(('You have muted time pings and may not use '
                              '``b!time`` as a result. '
                              'Do ``b!mutetime`` to unmute.'))
             return
 
-        if user.id in config['time_muted']:
+        if user.id in time_muted:
             await ctx.reply(f'``{user}`` has time pings muted.')
             return
 
-        prev_pingee = self.bot.get_user(config['time_pingee'])
-        prev_display = prev_pingee.name + '#' + prev_pingee.discriminator
+        # worked out before the write so a failure here changes nothing
+        prev_pingee_id = storage.time_pingee()
+        prev_pingee = (self.bot.get_user(prev_pingee_id)
+                       if prev_pingee_id is not None else None)
 
-        config['time_pingee'] = user.id
-        write_json('config.json', config)
+        if prev_pingee:
+            prev_display = prev_pingee.name + '#' + prev_pingee.discriminator
+        elif prev_pingee_id is not None:  # not cached
+            prev_display = str(prev_pingee_id)
+        else:
+            prev_display = 'no one'
+
+        storage.set_time_pingee(user.id)
 
         await ctx.reply((f'Time pings will now be sent to ``{user}`` '
                          f'(previously ``{prev_display}``)'))
@@ -66,25 +74,18 @@ class TimePings(commands.Cog):
     )
     @app_commands.guilds(BOT_TEST_SERVER, GFG_SERVER)
     async def mutetime(self, ctx: commands.Context):
-        config = read_json('config.json')
-
-        if ctx.author.id in config['time_muted']:
-            config['time_muted'].remove(ctx.author.id)
-            await ctx.reply('You can now receive time pings.')
-        else:
-            config['time_muted'].append(ctx.author.id)
+        if storage.toggle_time_muted(ctx.author.id):
             await ctx.reply('You will no longer receive time pings.')
-
-        write_json('config.json', config)
+        else:
+            await ctx.reply('You can now receive time pings.')
 
     # -----------------------------
     #           Ontario
     # -----------------------------
     @tasks.loop(hours=24)
     async def time_pm_on(self):
-        config = read_json('config.json')
         gfg_general = self.bot.get_channel(GFG_GENERAL_ID)
-        await gfg_general.send(f'<@{config["time_pingee"]}> time')
+        await gfg_general.send(f'<@{storage.time_pingee()}> time')
 
     @time_pm_on.before_loop
     async def wait_until_727pm_on(self):
@@ -101,9 +102,8 @@ class TimePings(commands.Cog):
     # -----------------------------
     @tasks.loop(hours=24)
     async def time_pm_ab(self):
-        config = read_json('config.json')
         gfg_general = self.bot.get_channel(GFG_GENERAL_ID)
-        await gfg_general.send(f'<@{config["time_pingee"]}> alberta time')
+        await gfg_general.send(f'<@{storage.time_pingee()}> alberta time')
 
     @time_pm_ab.before_loop
     async def wait_until_727pm_ab(self):
@@ -120,9 +120,8 @@ class TimePings(commands.Cog):
     # -----------------------------
     @tasks.loop(hours=24)
     async def time_pm_bc(self):
-        config = read_json('config.json')
         gfg_general = self.bot.get_channel(GFG_GENERAL_ID)
-        await gfg_general.send(f'<@{config["time_pingee"]}> bc time')
+        await gfg_general.send(f'<@{storage.time_pingee()}> bc time')
 
     @time_pm_bc.before_loop
     async def wait_until_727pm_bc(self):
@@ -19,4 +19,34 @@ GFG_GOLDFISH_EMOTE = os.getenv('GFG_GOLDFISH_EMOTE')
 MYSQL_USERNAME = os.getenv('MYSQL_USERNAME')
 MYSQL_PW = os.getenv('MYSQL_PW')
 OSUGFG_DB_NAME = os.getenv('OSUGFG_DB_NAME')
+MYSQL_POOL_MIN_SIZE = int(os.getenv('MYSQL_POOL_MIN_SIZE', '2'))
+MYSQL_POOL_MAX_SIZE = int(os.getenv('MYSQL_POOL_MAX_SIZE', '10'))
+# reopen connections well before MySQL's wait_timeout (8 hours) drops them
+MYSQL_POOL_RECYCLE = int(os.getenv('MYSQL_POOL_RECYCLE', '3600'))  # seconds
+MYSQL_POOL_PING_AFTER = float(os.getenv('MYSQL_POOL_PING_AFTER', '60'))
 VM_OSU_CACHE_DIR = os.getenv('VM_OSU_CACHE_DIR')
+# totals across every difficulty worker, each of which caches its share
+BEATMAP_CACHE_SIZE = int(os.getenv('BEATMAP_CACHE_SIZE', '500'))  # maps
+BEATMAP_CACHE_MAX_MB = int(os.getenv('BEATMAP_CACHE_MAX_MB', '128'))
+DIFFICULTY_CACHE_PATH = os.getenv('DIFFICULTY_CACHE_PATH',
+                                  './jsons/difficulty_cache.db')
+DIFFICULTY_WORKERS = int(os.getenv('DIFFICULTY_WORKERS', os.cpu_count() or 1))
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))  # bcrypt's cost factor
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', '2'))
+# hashes queued past this wouldn't finish within an interaction's 3 seconds
+BCRYPT_MAX_QUEUE = int(os.getenv('BCRYPT_MAX_QUEUE', '20'))
+
+GFG_API_TIMEOUT = float(os.getenv('GFG_API_TIMEOUT', '10'))  # seconds
+GFG_API_MAX_CONNECTIONS = int(os.getenv('GFG_API_MAX_CONNECTIONS', '20'))
+GFG_API_CACHE_SIZE = int(os.getenv('GFG_API_CACHE_SIZE', '512'))
+# read profiles and scores from the API, or straight from the server's db
+GFG_READ_BACKEND = os.getenv('GFG_READ_BACKEND', 'api')  # api or mysql
+
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sqlite')  # sqlite or json
+SQLITE_PATH = os.getenv('SQLITE_PATH', './jsons/talking_ben.db')
+ASSET_CACHE_MB = int(os.getenv('ASSET_CACHE_MB', '64'))  # media kept in memory
+# bots can't upload files over 25 MB, so bigger tags couldn't be sent
+TAG_MAX_ATTACHMENT_MB = int(os.getenv('TAG_MAX_ATTACHMENT_MB', '25'))
+# tag use counts are saved in batches, whichever of these comes first
+TAG_USAGE_FLUSH_INTERVAL = float(os.getenv('TAG_USAGE_FLUSH_INTERVAL', '60'))
+TAG_USAGE_FLUSH_EVERY = int(os.getenv('TAG_USAGE_FLUSH_EVERY', '100'))
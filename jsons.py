@@ -1,13 +1,140 @@
+import asyncio
 import json
+import os
+
+
+class JsonStore:
+    """
+    Process-wide store of the parsed files in <directory>.
+
+    Each file is parsed once and kept in memory; it is only re-read
+    from disk when its mtime or size changes (e.g. after a manual edit).
+
+    Writes update the in-memory copy immediately. When an event loop is
+    running, the flush to disk is deferred by <flush_delay> seconds so a
+    burst of writes to the same file results in a single flush, which is
+    done atomically (temp file + fsync + rename) in a worker thread.
+    """
+
+    def __init__(self, directory: str, flush_delay: float = 0.5):
+        self.directory = directory
+        self.flush_delay = flush_delay
+        # filename -> ((mtime_ns, size), parsed contents)
+        self._files: dict[str, tuple[tuple[int, int], dict]] = {}
+
+        self._flushers: dict[str, asyncio.Task] = {}
+        self._generations: dict[str, int] = {}
+        self._flush_now = asyncio.Event()
+
+    def _path(self, filename: str) -> str:
+        return f'{self.directory}/{filename}'
+
+    def _signature(self, filename: str) -> tuple[int, int]:
+        st = os.stat(self._path(filename))
+        return st.st_mtime_ns, st.st_size
+
+    def _write_atomic(self, filename: str, payload: str) -> tuple[int, int]:
+        """Replace <filename> with <payload> without ever truncating it."""
+        path = self._path(filename)
+        tmp_path = f'{path}.tmp'
+
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, path)
+        return self._signature(filename)
+
+    def read(self, filename: str) -> dict:
+        """
+        Return the parsed contents of <filename>.
+
+        The returned dictionary is shared by every caller, so mutate it
+        only when it is about to be written back with write().
+        """
+        cached = self._files.get(filename)
+
+        # the disk copy is behind the in-memory one until the flush is done
+        if cached and filename in self._flushers:
+            return cached[1]
+
+        sig = self._signature(filename)
+        if cached and cached[0] == sig:
+            return cached[1]
+
+        with open(self._path(filename), 'r') as f:
+            data = json.load(f)
+
+        self._files[filename] = (sig, data)
+        return data
+
+    def write(self, filename: str, json_: dict) -> None:
+        """Overwrite <filename> with <json_> and keep it in memory."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:  # no event loop (e.g. a script); write now
+            sig = self._write_atomic(filename, json.dumps(json_, indent=4))
+            self._files[filename] = (sig, json_)
+            return
+
+        cached = self._files.get(filename)
+        self._files[filename] = (cached[0] if cached else (0, 0), json_)
+        self._generations[filename] = self._generations.get(filename, 0) + 1
+
+        if filename not in self._flushers:
+            self._flushers[filename] = asyncio.create_task(
+                self._flush_later(filename)
+            )
+
+    async def _flush_later(self, filename: str) -> None:
+        """Flush <filename> once the coalescing window has passed."""
+        try:
+            await asyncio.wait_for(self._flush_now.wait(), self.flush_delay)
+        except asyncio.TimeoutError:
+            pass
+
+        try:
+            while True:
+                generation = self._generations[filename]
+                data = self._files[filename][1]
+
+                # serialize here so the worker thread never sees the dict
+                # while a command is mutating it
+                payload = json.dumps(data, indent=4)
+                sig = await asyncio.to_thread(
+                    self._write_atomic, filename, payload
+                )
+
+                # writes that happened during the flush need another one
+                if self._generations[filename] == generation:
+                    self._files[filename] = (sig, self._files[filename][1])
+                    break
+        finally:
+            del self._flushers[filename]
+
+    async def flush_all(self) -> None:
+        """Write every pending change to disk immediately."""
+        self._flush_now.set()
+        try:
+            await asyncio.gather(*self._flushers.values())
+        finally:
+            self._flush_now.clear()
+
+
+store = JsonStore('./jsons')
 
 
 def read_json(filename: str) -> dict:
     """Load ./jsons/<filename> and return it as a dictionary."""
-    with open(f'./jsons/{filename}', 'r') as f:
-        return json.load(f)
+    return store.read(filename)
 
 
 def write_json(filename: str, json_: dict) -> None:
     """Overwrite ./jsons/<filename> with <json_>."""
-    with open(f'./jsons/{filename}', 'w') as f:
-        json.dump(json_, f, indent=4)
+    store.write(filename, json_)
+
+
+async def flush_json() -> None:
+    """Wait for every pending JSON write to reach the disk."""
+    await store.flush_all()
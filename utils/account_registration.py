@@ -4,13 +4,12 @@
 import discord
 from discord import ui
 
-from env import MYSQL_USERNAME, MYSQL_PW, OSUGFG_DB_NAME
-from jsons import read_json, write_json
+from utils.gfg_server_accs import server_accs
+from utils.db import db
+from utils.password_hasher import HasherBusy, password_hasher
 
 import re
 import hashlib
-import bcrypt
-import aiomysql
 
 
 username_re = re.compile(r'^[\w \[\]-]{2,15}$')
@@ -27,10 +26,10 @@ def get_safe_name(name: str) -> str:
     return name.lower().replace(' ', '_')
 
 
-def hash_password(pw_plaintext: str) -> str:
+async def hash_password(pw_plaintext: str) -> bytes:
     """Hash a plaintext password (plaintext -> md5 -> bcrypt)."""
     pw_md5 = hashlib.md5(pw_plaintext.encode()).hexdigest().encode()
-    return bcrypt.hashpw(pw_md5, bcrypt.gensalt())
+    return await password_hasher.hash(pw_md5)
 
 
 async def register_db(name: str,
@@ -39,45 +38,37 @@ async def register_db(name: str,
                       pw_plaintext: str,
                       country: str):
     """Register a new account in the osu!Goldfish database."""
-    hashed_pw = hash_password(pw_plaintext)
-
-    # insert into db
-    async with aiomysql.connect(
-        host='localhost',
-        user=MYSQL_USERNAME,
-        password=MYSQL_PW,
-        db=OSUGFG_DB_NAME
-    ) as conn:
-        async with conn.cursor() as cur:
-            # add to `users` table.
-            await cur.execute(
-                'INSERT INTO users '
-                '(name, safe_name, email, pw_bcrypt, country, '
-                'creation_time, latest_activity) '
-
-                'VALUES '
-                '(%s, %s, %s, %s, %s, UNIX_TIMESTAMP(), UNIX_TIMESTAMP())',
-                [name, safe_name, email, hashed_pw, country]
-            )
-            user_id = cur.lastrowid
-
-            # add to `stats` table.
-            await cur.executemany(
-                'INSERT INTO stats '
-                '(id, mode) VALUES (%s, %s)',
-                [(user_id, mode) for mode in (
-                    0,  # vn!std
-                    1,  # vn!taiko
-                    2,  # vn!catch
-                    3,  # vn!mania
-                    4,  # rx!std
-                    5,  # rx!taiko
-                    6,  # rx!catch
-                    8,  # ap!std
-                )]
-            )
-
-            await conn.commit()
+    hashed_pw = await hash_password(pw_plaintext)
+
+    # insert into db (both tables or neither)
+    async with db.transaction() as cur:
+        # add to `users` table.
+        await cur.execute(
+            'INSERT INTO users '
+            '(name, safe_name, email, pw_bcrypt, country, '
+            'creation_time, latest_activity) '
+
+            'VALUES '
+            '(%s, %s, %s, %s, %s, UNIX_TIMESTAMP(), UNIX_TIMESTAMP())',
+            [name, safe_name, email, hashed_pw, country]
+        )
+        user_id = cur.lastrowid
+
+        # add to `stats` table.
+        await cur.executemany(
+            'INSERT INTO stats '
+            '(id, mode) VALUES (%s, %s)',
+            [(user_id, mode) for mode in (
+                0,  # vn!std
+                1,  # vn!taiko
+                2,  # vn!catch
+                3,  # vn!mania
+                4,  # rx!std
+                5,  # rx!taiko
+                6,  # rx!catch
+                8,  # ap!std
+            )]
+        )
 
 
 class AccountRegistration(ui.Modal, title='osu!Goldfish Account Registration'):
@@ -96,8 +87,7 @@ class AccountRegistration(ui.Modal, title='osu!Goldfish Account Registration'):
         max_length=32
     )
 
-    async def on_submit(self, interaction: discord.Interaction):
-        server_accs = read_json('server_accs.json')
+    def _validate(self) -> list[str]:
         errors = []  # respond to the user any errors their form submission has
 
         # validate username
@@ -107,22 +97,32 @@ class AccountRegistration(ui.Modal, title='osu!Goldfish Account Registration'):
         if '_' in str(self.username) and ' ' in str(self.username):
             errors.append('Username may contain "_" or " ", but not both.')
 
-        if get_safe_name(str(self.username)) in server_accs:
+        if server_accs.name_taken(get_safe_name(str(self.username))):
             errors.append('Username already taken by another user.')
 
         # validate email
         if not email_re.match(str(self.email)):
             errors.append('Invalid email syntax.')
 
-        for acc in server_accs:
-            if server_accs[acc]['email'] == str(self.email):
-                errors.append('Email already taken by another user.')
-                break
+        if server_accs.email_taken(str(self.email)):
+            errors.append('Email already taken by another user.')
 
         # validate password
         if len(set(str(self.pw_plaintext))) <= 3:
             errors.append('Password must have more than 3 unique characters.')
 
+        return errors
+
+    async def on_submit(self, interaction: discord.Interaction):
+        safe_name = get_safe_name(str(self.username))
+        email = str(self.email)
+
+        # no await between the check and the reservation, so two
+        # submissions can't both claim the same username or email
+        errors = self._validate()
+        if not errors:
+            server_accs.reserve(safe_name, email)
+
         if errors:
             await interaction.response.send_message(
                 (
@@ -133,21 +133,30 @@ class AccountRegistration(ui.Modal, title='osu!Goldfish Account Registration'):
             )
             return
 
-        await register_db(
-            str(self.username),
-            get_safe_name(str(self.username)),
-            str(self.email),
-            str(self.pw_plaintext),
-            'ca'
-        )
-
-        server_accs[get_safe_name(str(self.username))] = {
-            'discord_id': interaction.user.id,
-            'email': str(self.email)
-        }
-        write_json('server_accs.json', server_accs)
+        # hashing and the insert can take longer than the 3 seconds
+        # Discord waits for a response
+        await interaction.response.defer(ephemeral=True)
+
+        try:
+            await register_db(
+                str(self.username),
+                safe_name,
+                email,
+                str(self.pw_plaintext),
+                'ca'
+            )
+            server_accs.register(safe_name, interaction.user.id, email)
+        except HasherBusy:
+            await interaction.followup.send(
+                'Too many accounts are being registered right now. '
+                'Please try again in a minute.',
+                ephemeral=True
+            )
+            return
+        finally:
+            server_accs.release(safe_name, email)
 
-        await interaction.response.send_message(
+        await interaction.followup.send(
             f'You have successfully registered as **{self.username}** '
             'on the osu!Goldfish private server!'
         )
@@ -0,0 +1,147 @@
+import hashlib
+import io
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import discord
+
+from env import ASSET_CACHE_MB
+
+
+class _Entry(NamedTuple):
+    mtime_ns: int
+    size: int
+    data: Optional[bytes]  # None if the file is too big to keep around
+    digest: bytes  # sha256 of the contents
+
+
+class AssetManager:
+    """
+    The bot's media files under <root>, kept in memory.
+
+    Files and directory listings are read once and then only re-read if
+    their mtime (or size) has changed, which is checked at most every
+    <check_interval> seconds. Files bigger than <max_file_size> bytes
+    aren't kept in memory and are sent straight from disk, and once the
+    files kept add up to more than <max_cache_size> bytes, the least
+    recently used ones are dropped.
+    """
+
+    def __init__(self,
+                 root: str,
+                 max_file_size: int = 8 * 1024 * 1024,
+                 max_cache_size: int = 64 * 1024 * 1024,
+                 check_interval: float = 5):
+        self.root = root
+        self.max_file_size = max_file_size
+        self.max_cache_size = max_cache_size
+        self.check_interval = check_interval
+
+        self._files: OrderedDict[str, _Entry] = OrderedDict()
+        self._cache_size = 0  # bytes of file contents in _files
+        self._dirs: dict[str, tuple[int, list[str]]] = {}
+        self._checked: dict[str, float] = {}  # path -> when it was stat'ed
+
+        self.reads = 0
+        self.evictions = 0
+
+    def _due(self, path: str) -> bool:
+        # whether <path> should be stat'ed again for changes
+        checked = self._checked.get(path)
+        return (checked is None
+                or time.monotonic() - checked >= self.check_interval)
+
+    def _forget(self, path: str) -> None:
+        entry = self._files.pop(path, None)
+        if entry and entry.data is not None:
+            self._cache_size -= entry.size
+        self._checked.pop(path, None)
+
+    def _load(self, path: str) -> _Entry:
+        entry = self._files.get(path)
+        if entry:
+            self._files.move_to_end(path)
+            if not self._due(path):
+                return entry
+
+        stat = os.stat(os.path.join(self.root, path))
+        if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+            data = None
+            sha256 = hashlib.sha256()
+            with open(os.path.join(self.root, path), 'rb') as f:
+                if stat.st_size <= self.max_file_size:
+                    data = f.read()
+                    sha256.update(data)
+                else:
+                    while chunk := f.read(1024 * 1024):
+                        sha256.update(chunk)
+            self.reads += 1
+
+            self._forget(path)
+            entry = self._files[path] = _Entry(stat.st_mtime_ns, stat.st_size,
+                                               data, sha256.digest())
+            if data is not None:
+                self._cache_size += entry.size
+
+            # drop the least recently used files over the budget
+            while self._cache_size > self.max_cache_size:
+                self._forget(next(iter(self._files)))
+                self.evictions += 1
+
+        self._checked[path] = time.monotonic()
+        return entry
+
+    def listdir(self, directory: str) -> list[str]:
+        """Return the names of the files in <directory>."""
+        cached = self._dirs.get(directory)
+        if cached and not self._due(directory):
+            return cached[1]
+
+        # adding, removing or renaming a file changes its directory's mtime
+        mtime_ns = os.stat(os.path.join(self.root, directory)).st_mtime_ns
+        if cached is None or cached[0] != mtime_ns:
+            names = sorted(os.listdir(os.path.join(self.root, directory)))
+
+            if cached:  # forget files that are gone
+                for name in set(cached[1]) - set(names):
+                    self._forget(os.path.join(directory, name))
+
+            cached = self._dirs[directory] = (mtime_ns, names)
+
+        self._checked[directory] = time.monotonic()
+        return cached[1]
+
+    def preload(self, directory: str) -> None:
+        """Read every file in <directory> ahead of its first use."""
+        for name in self.listdir(directory):
+            self._load(os.path.join(directory, name))
+
+    def file(self, path: str, cache: bool = True) -> discord.File:
+        """
+        Return a discord.File for the asset at <path>, read straight from
+        disk (without hashing it) unless <cache>.
+        """
+        if not cache:
+            return discord.File(os.path.join(self.root, path))
+
+        data = self._load(path).data
+
+        if data is None:
+            return discord.File(os.path.join(self.root, path))
+        return discord.File(io.BytesIO(data),
+                            filename=os.path.basename(path))
+
+    def digest(self, path: str) -> bytes:
+        """Return the sha256 of the asset at <path>."""
+        return self._load(path).digest
+
+    def choice(self, directory: str) -> str:
+        """Return the path of a random asset in <directory>."""
+        return os.path.join(directory, random.choice(self.listdir(directory)))
+
+
+assets = AssetManager('./assets',
+                      max_cache_size=ASSET_CACHE_MB * 1024 * 1024)
@@ -0,0 +1,121 @@
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from rosu_pp_py import Beatmap, Calculator
+
+from env import (
+    VM_OSU_CACHE_DIR,
+    BEATMAP_CACHE_SIZE,
+    BEATMAP_CACHE_MAX_MB,
+    DIFFICULTY_WORKERS
+)
+
+
+class BeatmapCache:
+    """
+    An LRU cache of parsed rosu beatmaps from the .osu files in <directory>.
+
+    Holds at most <capacity> beatmaps whose .osu files add up to at most
+    <max_bytes> (a parsed map takes memory roughly proportional to its
+    file). A map is re-parsed if its file has changed since it was cached.
+    """
+
+    def __init__(self, directory: str, capacity: int, max_bytes: int):
+        self.directory = directory
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        # diff_id -> ((mtime_ns, size), parsed beatmap)
+        self._maps: OrderedDict[int, tuple[tuple[int, int], Beatmap]] = \
+            OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._maps)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
+
+    def path(self, diff_id: int) -> str:
+        return f'{self.directory}/{diff_id}.osu'
+
+    def get(self, diff_id: int) -> Beatmap:
+        """
+        Return the parsed beatmap <diff_id>.
+
+        Raise OSError if its .osu file is missing, or rosu's parse error
+        if the file is invalid.
+        """
+        path = self.path(diff_id)
+        st = os.stat(path)
+        sig = (st.st_mtime_ns, st.st_size)
+
+        cached = self._maps.get(diff_id)
+        if cached:
+            if cached[0] == sig:
+                self.hits += 1
+                self._maps.move_to_end(diff_id)
+                return cached[1]
+
+            self.invalidations += 1
+            self._remove(diff_id)
+
+        self.misses += 1
+        beatmap = Beatmap(path=path)
+
+        self._maps[diff_id] = (sig, beatmap)
+        self.bytes += st.st_size
+        self._evict()
+
+        return beatmap
+
+    def _remove(self, diff_id: int) -> None:
+        sig, _ = self._maps.pop(diff_id)
+        self.bytes -= sig[1]
+
+    def _evict(self) -> None:
+        # always keep the newest map, even if it's bigger than <max_bytes>
+        while len(self._maps) > 1 and (len(self._maps) > self.capacity or
+                                       self.bytes > self.max_bytes):
+            self._remove(next(iter(self._maps)))
+            self.evictions += 1
+
+
+# each difficulty worker has its own cache, so they split the budget
+beatmap_cache = BeatmapCache(
+    VM_OSU_CACHE_DIR,
+    capacity=max(1, BEATMAP_CACHE_SIZE // DIFFICULTY_WORKERS),
+    max_bytes=BEATMAP_CACHE_MAX_MB * 1024 * 1024 // DIFFICULTY_WORKERS
+)
+
+
+def calculate_difficulty(diff_id: int,
+                         mods: int,
+                         mode: int) -> Optional[tuple[float, Optional[int]]]:
+    """
+    Return the (star rating, max combo) of beatmap <diff_id> with <mods>
+    applied, played in <mode>, or None if its .osu file can't be read.
+
+    Runs in the difficulty engine's worker processes, each of which has
+    its own <beatmap_cache>.
+    """
+    try:
+        map = beatmap_cache.get(diff_id)
+    except Exception:  # should be a ParseError when testing locally
+        # can't catch directly because the error is defined in Rust :(
+        return None
+
+    diff = Calculator(mode=mode, mods=mods).difficulty(map)
+    return diff.stars, getattr(diff, 'max_combo', None)
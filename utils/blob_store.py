@@ -0,0 +1,173 @@
+import hashlib
+import os
+import time
+import uuid
+from collections import Counter
+from typing import Iterable, Optional
+
+import aiohttp
+
+from env import TAG_MAX_ATTACHMENT_MB
+
+
+class BlobTooLarge(Exception):
+    """Raised when a download goes over the store's size limit."""
+
+
+class BlobStore:
+    """
+    Files under <root> named by the sha256 of their contents, so the same
+    file saved twice is only stored once.
+
+    Each file is reference counted by the tags that use it and is only
+    removed once none do. Downloads are streamed to disk in chunks of
+    <chunk_size> bytes and stop at <max_size> bytes. Files that no tag
+    uses at all are only moved to <quarantine> by collect(), never
+    deleted.
+    """
+
+    PARTIAL = '.part'  # suffix of downloads in progress
+
+    def __init__(self,
+                 root: str,
+                 quarantine: str,
+                 max_size: int,
+                 chunk_size: int = 64 * 1024):
+        self.root = root
+        self.quarantine = quarantine
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.refs: Counter[str] = Counter()  # filename -> tags using it
+
+        self.saved = 0
+        self.deduplicated = 0
+        self.removed = 0
+        self.quarantined = 0
+
+    def load_refs(self, filenames: Iterable[str]) -> None:
+        """Count a reference for each of the existing <filenames>."""
+        self.refs = Counter(filenames)
+
+    @staticmethod
+    def _extension(filename: str) -> str:
+        extension = filename.rsplit('.', 1)[-1] if '.' in filename else ''
+        extension = ''.join(c for c in extension.lower() if c.isalnum())
+        return '.' + extension if extension else ''
+
+    async def save(self, url: str, filename: str) -> str:
+        """
+        Download <url> (a file called <filename>) into the store and
+        return the name it's stored under, counting one reference to it.
+
+        Raise BlobTooLarge if it's bigger than the store's <max_size>.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        partial = os.path.join(self.root, uuid.uuid4().hex + self.PARTIAL)
+        sha256 = hashlib.sha256()
+        size = 0
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, raise_for_status=True) as resp:
+                    if (resp.content_length or 0) > self.max_size:
+                        raise BlobTooLarge
+
+                    with open(partial, 'wb') as f:
+                        async for chunk in resp.content.iter_chunked(
+                            self.chunk_size
+                        ):
+                            size += len(chunk)
+                            if size > self.max_size:
+                                raise BlobTooLarge
+                            sha256.update(chunk)
+                            f.write(chunk)
+
+            name = sha256.hexdigest() + self._extension(filename)
+            path = os.path.join(self.root, name)
+
+            if os.path.exists(path):
+                self.deduplicated += 1
+            else:
+                os.replace(partial, path)
+                self.saved += 1
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+        self.refs[name] += 1
+        return name
+
+    @staticmethod
+    def digest(name: str) -> Optional[bytes]:
+        """
+        Return the sha256 that <name> was stored under, or None if it's
+        a file from before the store (named after its tag).
+        """
+        stem = name.split('.', 1)[0]
+        if len(stem) != 64:
+            return None
+        try:
+            return bytes.fromhex(stem)
+        except ValueError:
+            return None
+
+    def release(self, name: str) -> None:
+        """Drop a reference to <name>, removing it once it has none."""
+        self.refs[name] -= 1
+        if self.refs[name] <= 0:
+            del self.refs[name]
+            self._remove(name)
+
+    def _remove(self, name: str) -> None:
+        try:
+            os.remove(os.path.join(self.root, name))
+            self.removed += 1
+        except FileNotFoundError:
+            pass
+
+    def collect(self, partial_age: float = 3600) -> list[str]:
+        """
+        Move files that no tag uses to the quarantine directory, remove
+        downloads abandoned more than <partial_age> seconds ago, and
+        return the names of both.
+
+        Nothing is moved if no tag uses any file, since that's more
+        likely a wrong or empty database than every tag being deleted.
+        """
+        if not os.path.isdir(self.root) or not self.refs:
+            return []
+
+        collected = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+
+            if name.startswith('.'):  # e.g. .gitkeep
+                continue
+            elif name.endswith(self.PARTIAL):
+                if time.time() - os.path.getmtime(path) < partial_age:
+                    continue  # possibly still downloading
+                os.remove(path)
+            elif name in self.refs:
+                continue
+            else:
+                os.makedirs(self.quarantine, exist_ok=True)
+                os.replace(path, os.path.join(self.quarantine, name))
+                self.quarantined += 1
+
+            collected.append(name)
+        return collected
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'files': len(self.refs),
+            'references': sum(self.refs.values()),
+            'saved': self.saved,
+            'deduplicated': self.deduplicated,
+            'removed': self.removed,
+            'quarantined': self.quarantined
+        }
+
+
+blobs = BlobStore('./assets/tags',
+                  quarantine='./assets/tags_orphaned',
+                  max_size=TAG_MAX_ATTACHMENT_MB * 1024 * 1024)
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class TTLCache:
+    """
+    A bounded LRU cache whose entries expire after a per-entry TTL.
+
+    An expired entry is still served for <stale_ttl> more seconds while
+    a background task refreshes it (stale-while-revalidate), so callers
+    only wait on the network when an entry is missing or very old.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        # key -> (value, fetched_at, ttl, stale_ttl)
+        self._entries: OrderedDict[Hashable, tuple] = OrderedDict()
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'refresh_errors': self.refresh_errors
+        }
+
+    def put(self, key: Hashable, value: Any,
+            ttl: float, stale_ttl: float = 0) -> None:
+        self._entries[key] = (value, time.monotonic(), ttl, stale_ttl)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    async def get(self,
+                  key: Hashable,
+                  fetch: Callable[[], Awaitable[Any]],
+                  ttl: float,
+                  stale_ttl: float = 0) -> Any:
+        """
+        Return the value cached under <key>, calling <fetch> to
+        (re)load it when it is missing or has expired.
+        """
+        entry = self._entries.get(key)
+
+        if entry:
+            value, fetched_at, entry_ttl, entry_stale_ttl = entry
+            age = time.monotonic() - fetched_at
+            self._entries.move_to_end(key)
+
+            if age < entry_ttl:
+                self.hits += 1
+                return value
+
+            if age < entry_ttl + entry_stale_ttl:
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing[key] = asyncio.create_task(
+                        self._refresh(key, fetch, ttl, stale_ttl)
+                    )
+                return value
+
+        self.misses += 1
+        value = await fetch()
+        self.put(key, value, ttl, stale_ttl)
+        return value
+
+    async def _refresh(self,
+                       key: Hashable,
+                       fetch: Callable[[], Awaitable[Any]],
+                       ttl: float,
+                       stale_ttl: float) -> None:
+        try:
+            self.put(key, await fetch(), ttl, stale_ttl)
+        except Exception:  # keep serving the stale value until it expires
+            self.refresh_errors += 1
+        finally:
+            del self._refreshing[key]
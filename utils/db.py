@@ -0,0 +1,158 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import aiomysql
+
+from env import (
+    MYSQL_USERNAME,
+    MYSQL_PW,
+    OSUGFG_DB_NAME,
+    MYSQL_POOL_MIN_SIZE,
+    MYSQL_POOL_MAX_SIZE,
+    MYSQL_POOL_RECYCLE,
+    MYSQL_POOL_PING_AFTER
+)
+from utils.metrics import percentile
+
+
+class Database:
+    """
+    A pool of connections to the osu!Goldfish MySQL database.
+
+    At most <maxsize> connections are ever open; past that, callers wait
+    for one to be given back instead of opening more. A connection that
+    has sat idle for <ping_after> seconds is pinged (and reconnected if
+    the server dropped it) before it's handed out, and connections older
+    than <recycle> seconds are replaced.
+    """
+
+    def __init__(self,
+                 minsize: int,
+                 maxsize: int,
+                 recycle: float,
+                 ping_after: float):
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.recycle = recycle
+        self.ping_after = ping_after
+
+        self.pool: Optional[aiomysql.Pool] = None
+        self._opening = asyncio.Lock()
+
+        self.acquires = 0
+        self.waiting = 0
+        self.health_checks = 0
+        self.acquire_times: deque[float] = deque(maxlen=500)
+
+    async def open(self) -> None:
+        """Open the pool and its first <minsize> connections."""
+        async with self._opening:
+            if self.pool is not None:
+                return
+
+            self.pool = await aiomysql.create_pool(
+                host='localhost',
+                user=MYSQL_USERNAME,
+                password=MYSQL_PW,
+                db=OSUGFG_DB_NAME,
+                minsize=self.minsize,
+                maxsize=self.maxsize,
+                pool_recycle=self.recycle,
+                # a pooled connection must not keep reading from the
+                # snapshot of a transaction it opened long ago
+                autocommit=True
+            )
+
+        # make sure the connections actually work
+        await self.fetchone('SELECT 1')
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiomysql.Connection]:
+        """Borrow a connection from the pool, opening it if needed."""
+        if self.pool is None:
+            await self.open()
+
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            conn = await self.pool.acquire()
+        finally:
+            self.waiting -= 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            if loop.time() - conn.last_usage > self.ping_after:
+                self.health_checks += 1
+                await conn.ping(reconnect=True)
+
+            self.acquires += 1
+            self.acquire_times.append(time.perf_counter() - start)
+
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiomysql.Cursor]:
+        """
+        Return a cursor whose statements are committed together on exit,
+        or rolled back if anything goes wrong.
+        """
+        async with self.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor() as cur:
+                    yield cur
+            except BaseException:
+                await conn.rollback()
+                raise
+
+            await conn.commit()
+
+    async def execute(self, query: str, args=None) -> int:
+        """Run a single statement and return the number of rows affected."""
+        async with self.acquire() as conn:
+            async with conn.cursor() as cur:
+                return await cur.execute(query, args)
+
+    async def fetchone(self, query: str, args=None) -> Optional[dict]:
+        async with self.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute(query, args)
+                return await cur.fetchone()
+
+    async def fetchall(self, query: str, args=None) -> list[dict]:
+        async with self.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute(query, args)
+                return list(await cur.fetchall())
+
+    def stats(self) -> dict:
+        times = sorted(self.acquire_times)
+
+        return {
+            'size': self.pool.size if self.pool else 0,
+            'free': self.pool.freesize if self.pool else 0,
+            'waiting': self.waiting,
+            'acquires': self.acquires,
+            'health_checks': self.health_checks,
+            'acquire_p50': percentile(times, 0.5),
+            'acquire_p95': percentile(times, 0.95)
+        }
+
+
+db = Database(
+    minsize=MYSQL_POOL_MIN_SIZE,
+    maxsize=MYSQL_POOL_MAX_SIZE,
+    recycle=MYSQL_POOL_RECYCLE,
+    ping_after=MYSQL_POOL_PING_AFTER
+)
@@ -0,0 +1,127 @@
+import sqlite3
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from env import DIFFICULTY_CACHE_PATH
+
+
+# mods that don't change a map's difficulty attributes
+IRRELEVANT_MODS = (
+    1          # NoFail
+    | 32       # SuddenDeath
+    | 512      # Nightcore (always sent along with DoubleTime)
+    | 16384    # Perfect
+)
+
+# relax/autopilot modes are calculated as their vanilla counterparts
+VANILLA_MODES = {4: 0, 5: 1, 6: 2, 8: 0}
+
+
+class DifficultyKey(NamedTuple):
+    diff_id: int
+    md5: bytes  # hash of the .osu file the attributes were calculated from
+    mods: int
+    mode: int
+
+
+class DifficultyAttrs(NamedTuple):
+    stars: float
+    max_combo: Optional[int]
+
+
+def difficulty_key(diff_id: int, md5: str, mods: int,
+                   mode: int) -> DifficultyKey:
+    """
+    Return the cache key for the difficulty of beatmap <diff_id> (whose
+    file has the hex digest <md5>) with <mods> applied, played in <mode>.
+
+    Mods and modes that don't affect difficulty are normalized away so
+    e.g. HDDT and HDNC, or relax and standard, share an entry.
+    """
+    return DifficultyKey(
+        diff_id,
+        bytes.fromhex(md5),
+        mods & ~IRRELEVANT_MODS,
+        VANILLA_MODES.get(mode, mode)
+    )
+
+
+class DifficultyCache:
+    """
+    Difficulty attributes that survive restarts: a bounded in-memory LRU
+    in front of a small SQLite file at <path>.
+    """
+
+    def __init__(self, path: str, memory_size: int = 10_000):
+        self.memory_size = memory_size
+        self._memory: OrderedDict[DifficultyKey, DifficultyAttrs] = \
+            OrderedDict()
+
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS difficulty ('
+            'diff_id INTEGER NOT NULL, '
+            'md5 BLOB NOT NULL, '
+            'mods INTEGER NOT NULL, '
+            'mode INTEGER NOT NULL, '
+            'stars REAL NOT NULL, '
+            'max_combo INTEGER, '
+            'PRIMARY KEY (diff_id, md5, mods, mode)'
+            ') WITHOUT ROWID'
+        )
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'memory_size': len(self._memory),
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses
+        }
+
+    def _remember(self, key: DifficultyKey, attrs: DifficultyAttrs) -> None:
+        self._memory[key] = attrs
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: DifficultyKey) -> Optional[DifficultyAttrs]:
+        attrs = self._memory.get(key)
+        if attrs:
+            self.memory_hits += 1
+            self._memory.move_to_end(key)
+            return attrs
+
+        row = self.conn.execute(
+            'SELECT stars, max_combo FROM difficulty '
+            'WHERE diff_id = ? AND md5 = ? AND mods = ? AND mode = ?',
+            key
+        ).fetchone()
+        if not row:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        attrs = DifficultyAttrs(*row)
+        self._remember(key, attrs)
+        return attrs
+
+    def put(self, key: DifficultyKey, attrs: DifficultyAttrs) -> None:
+        self._remember(key, attrs)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO difficulty '
+            '(diff_id, md5, mods, mode, stars, max_combo) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            key + attrs
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+difficulty_cache = DifficultyCache(DIFFICULTY_CACHE_PATH)
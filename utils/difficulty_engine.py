@@ -0,0 +1,136 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Optional
+
+from env import DIFFICULTY_WORKERS
+from utils.beatmap_cache import calculate_difficulty
+from utils.difficulty_cache import (
+    DifficultyAttrs,
+    DifficultyCache,
+    DifficultyKey,
+    difficulty_cache,
+    difficulty_key
+)
+from utils.gfg_api import Score
+
+
+class DifficultyEngine:
+    """
+    Calculate difficulty attributes for batches of beatmaps in a pool of
+    <workers> processes, so the CPU-bound rosu work never runs on (or
+    blocks) the event loop.
+
+    Results are read from and saved to <cache>; each distinct job in a
+    batch is only calculated once. At most <max_pending> jobs are handed
+    to the pool at a time, and further jobs wait for a free slot.
+    """
+
+    def __init__(self,
+                 cache: DifficultyCache,
+                 workers: int,
+                 max_pending: int = None):
+        self.cache = cache
+        self.workers = workers
+        self._slots = asyncio.Semaphore(max_pending or workers * 2)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self.calculated = 0
+        self.failed = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if not self._pool:
+            # spawn rather than fork: the bot process has threads and
+            # open connections that children shouldn't inherit. Spawned
+            # workers re-import main.py, which is why the bot is in bot.py
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _calculate(self,
+                         key: DifficultyKey) -> Optional[DifficultyAttrs]:
+        async with self._slots:
+            pool = self._get_pool()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    pool,
+                    calculate_difficulty,
+                    key.diff_id,
+                    key.mods,
+                    key.mode
+                )
+            except BrokenProcessPool:
+                # a worker died; start a new pool for the next jobs
+                if self._pool is pool:
+                    self.shutdown()
+                result = None
+            except Exception as e:
+                print(f'Could not calculate difficulty for {key}: {e!r}')
+                result = None
+
+        if result is None:
+            self.failed += 1
+            return None
+
+        self.calculated += 1
+        attrs = DifficultyAttrs(*result)
+        self.cache.put(key, attrs)
+        return attrs
+
+    async def calculate(
+        self,
+        keys: Iterable[DifficultyKey]
+    ) -> dict[DifficultyKey, Optional[DifficultyAttrs]]:
+        """
+        Return the difficulty attributes for each of <keys>, or None for
+        the ones whose beatmaps couldn't be read or calculated.
+        """
+        results: dict[DifficultyKey, Optional[DifficultyAttrs]] = {}
+        misses: list[DifficultyKey] = []
+
+        for key in dict.fromkeys(keys):  # deduplicate, keeping order
+            results[key] = self.cache.get(key)
+            if results[key] is None:
+                misses.append(key)
+
+        calculated = await asyncio.gather(
+            *(self._calculate(key) for key in misses)
+        )
+        results.update(zip(misses, calculated))
+
+        return results
+
+    async def star_ratings(self, mode: int,
+                           scores: Iterable[Score]) -> list[float]:
+        """
+        Return the star rating of each score's map with its mods applied,
+        falling back to the API's (nomod) rating if it can't be calculated.
+        """
+        scores = list(scores)
+        keys = [
+            difficulty_key(
+                score.beatmap.diff_id,
+                score.beatmap.md5,
+                score.mods.value,
+                mode
+            )
+            for score in scores
+        ]
+        results = await self.calculate(keys)
+
+        return [
+            results[key].stars if results[key]
+            else score.beatmap.star_rating
+            for key, score in zip(keys, scores)
+        ]
+
+
+difficulty_engine = DifficultyEngine(difficulty_cache, DIFFICULTY_WORKERS)
@@ -1,8 +1,7 @@
 import discord
 
-from env import MYSQL_USERNAME, MYSQL_PW, OSUGFG_DB_NAME
+from utils.db import db
 
-import aiomysql
 from iso3166 import countries
 
 
@@ -11,18 +10,10 @@ async def update_flag_in_db(user_safe_name: str,
     """Update a user's flag in the osu!Goldfish database."""
     country_code = country_code.lower()
 
-    async with aiomysql.connect(
-        host='localhost',
-        user=MYSQL_USERNAME,
-        password=MYSQL_PW,
-        db=OSUGFG_DB_NAME
-    ) as conn:
-        async with conn.cursor() as cur:
-            await cur.execute(
-                'UPDATE users SET country = %s WHERE safe_name = %s',
-                [country_code, user_safe_name]
-            )
-            await conn.commit()
+    await db.execute(
+        'UPDATE users SET country = %s WHERE safe_name = %s',
+        [country_code, user_safe_name]
+    )
 
 
 async def process_flag_change(interaction: discord.Interaction,
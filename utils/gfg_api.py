@@ -1,134 +1,397 @@
 # osu!Goldfish API Wrapper
 
 from typing import Optional
-import requests
-from datetime import datetime
+import asyncio
+import aiohttp
+import pymysql
+from array import array
+from datetime import datetime, timezone
 from ossapi import Mod
 
+from env import (
+    GFG_API_TIMEOUT,
+    GFG_API_MAX_CONNECTIONS,
+    GFG_API_CACHE_SIZE,
+    GFG_READ_BACKEND
+)
+from utils.cache import TTLCache
+from utils.gfg_db import fetch_player_info, fetch_player_scores
+from utils.resilience import Backend
+
 
 API_URL = 'https://api.victoryu.dev/v1/'
 
+# (endpoint, scope) -> (ttl, stale_ttl) in seconds for cached requests
+CACHE_TTLS = {
+    ('get_player_info', 'all'): (60, 600),
+    # a stale recent score is exactly what /recent must not show
+    ('get_player_scores', 'recent'): (10, 0),
+    ('get_player_scores', 'best'): (300, 1800),
+}
+
+
+class _Field:
+    """A model attribute read straight from the model's raw API data."""
+
+    def __init__(self, key, convert=None):
+        self.key = key
+        self.convert = convert
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+
+        value = obj._data[self.key]
+        return self.convert(value) if self.convert else value
+
+
+def _parse_api_time(value) -> datetime:
+    if isinstance(value, datetime):  # read from the database
+        return value.replace(tzinfo=timezone.utc)
+    return datetime.fromisoformat(value + '+00:00')
+
+
+# The models below only keep a reference to the JSON they came from and
+# decode each field on access, so building one costs next to nothing
+# even when most of its fields are never read.
 
 class UserStats:
+    __slots__ = ('gamemode', '_data')
+
     def __init__(self, gamemode, data):
         self.gamemode = gamemode
-        self.total_score = data['tscore']
-        self.ranked_score = data['rscore']
-        self.pp = data['pp']
-        self.playcount = data['plays']
-        self.playtime = data['playtime']
-        self.acc = data['acc']
-        self.max_combo = data['max_combo']
-        self.total_hits = data['total_hits']
-        self.replay_views = data['replay_views']
-        self.xh_count = data['xh_count']
-        self.x_count = data['x_count']
-        self.sh_count = data['sh_count']
-        self.s_count = data['s_count']
-        self.a_count = data['a_count']
-        self.rank = data['rank']
-        self.country_rank = data['country_rank']
+        self._data = data
+
+    total_score = _Field('tscore')
+    ranked_score = _Field('rscore')
+    pp = _Field('pp')
+    playcount = _Field('plays')
+    playtime = _Field('playtime')
+    acc = _Field('acc')
+    max_combo = _Field('max_combo')
+    total_hits = _Field('total_hits')
+    replay_views = _Field('replay_views')
+    xh_count = _Field('xh_count')
+    x_count = _Field('x_count')
+    sh_count = _Field('sh_count')
+    s_count = _Field('s_count')
+    a_count = _Field('a_count')
+    rank = _Field('rank')
+    country_rank = _Field('country_rank')
 
 
 class User:
+    __slots__ = ('_data', 'stats', 'all_stats')
+
     def __init__(self, data):
-        self.id = data['id']
-        self.name = data['name']
-        self.country = data['country']
-        self.creation_time = datetime.fromtimestamp(data['creation_time'])
-        self.latest_activity = datetime.fromtimestamp(data['latest_activity'])
+        self._data = data
         self.stats: UserStats = None
+        self.all_stats: dict[str, dict] = {}
+
+    id = _Field('id')
+    name = _Field('name')
+    country = _Field('country')
+    creation_time = _Field('creation_time', datetime.fromtimestamp)
+    latest_activity = _Field('latest_activity', datetime.fromtimestamp)
 
     def add_stats(self, stats):
         self.stats = stats
 
+    def stats_for(self, mode) -> UserStats:
+        # Returns the player's stats for any gamemode in the same response
+        return UserStats(str(mode), self.all_stats[str(mode)])
+
 
 class Beatmap:
+    __slots__ = ('_data',)
+
     def __init__(self, data):
-        self.md5 = data['md5']
-        self.diff_id = data['id']
-        self.set_id = data['set_id']
-        self.artist = data['artist']
-        self.title = data['title']
-        self.difficulty = data['version']
-        self.creator = data['creator']
-        self.last_update = datetime.fromisoformat(
-            data['last_update'] + '+00:00'
-        )
-        self.length = data['total_length']
-        self.max_combo = data['max_combo']
-        self.status = data['status']
-        self.plays = data['plays']
-        self.passes = data['passes']
-        self.mode = data['mode']
-        self.bpm = data['bpm']
-        self.cs = data['cs']
-        self.od = data['od']
-        self.ar = data['ar']
-        self.hp = data['hp']
-        self.star_rating = data['diff']
+        self._data = data
+
+    md5 = _Field('md5')
+    diff_id = _Field('id')
+    set_id = _Field('set_id')
+    artist = _Field('artist')
+    title = _Field('title')
+    difficulty = _Field('version')
+    creator = _Field('creator')
+    last_update = _Field('last_update', _parse_api_time)
+    length = _Field('total_length')
+    max_combo = _Field('max_combo')
+    status = _Field('status')
+    plays = _Field('plays')
+    passes = _Field('passes')
+    mode = _Field('mode')
+    bpm = _Field('bpm')
+    cs = _Field('cs')
+    od = _Field('od')
+    ar = _Field('ar')
+    hp = _Field('hp')
+    star_rating = _Field('diff')
 
 
 class Score:
+    __slots__ = ('_data', '_mods', '_play_time', '_beatmap')
+
     def __init__(self, data):
-        self.id = data['id']
-        self.score = data['score']
-        self.pp = data['pp']
-        self.acc = data['acc']
-        self.max_combo = data['max_combo']
-        self.mods = Mod(data['mods'])
-        self.n300 = data['n300']
-        self.n100 = data['n100']
-        self.n50 = data['n50']
-        self.nmiss = data['nmiss']
-        self.grade = data['grade']
-        self.status = data['status']
-        self.mode = data['mode']
-        self.play_time = datetime.fromisoformat(data['play_time'] + '+00:00')
-        self.perfect = bool(data['perfect'])
-        self.beatmap = Beatmap(data['beatmap'])
-        self.time_elapsed = data['time_elapsed']
-
-
-def api_get(endpoint, params=None):
+        self._data = data
+        # decoded on first access
+        self._mods: Optional[Mod] = None
+        self._play_time: Optional[datetime] = None
+        self._beatmap: Optional[Beatmap] = None
+
+    id = _Field('id')
+    score = _Field('score')
+    pp = _Field('pp')
+    acc = _Field('acc')
+    max_combo = _Field('max_combo')
+    n300 = _Field('n300')
+    n100 = _Field('n100')
+    n50 = _Field('n50')
+    nmiss = _Field('nmiss')
+    grade = _Field('grade')
+    status = _Field('status')
+    mode = _Field('mode')
+    perfect = _Field('perfect', bool)
+    time_elapsed = _Field('time_elapsed')
+
+    @property
+    def mods(self) -> Mod:
+        if self._mods is None:
+            self._mods = Mod(self._data['mods'])
+        return self._mods
+
+    @property
+    def play_time(self) -> datetime:
+        if self._play_time is None:
+            self._play_time = _parse_api_time(self._data['play_time'])
+        return self._play_time
+
+    @property
+    def beatmap(self) -> Beatmap:
+        if self._beatmap is None:
+            self._beatmap = Beatmap(self._data['beatmap'])
+        return self._beatmap
+
+
+class ScoreBatch:
+    """
+    A whole `scores` array from the API, stored column by column.
+
+    The columns needed to sort, filter or batch-process scores are packed
+    into arrays up front; Score objects are only created for the rows that
+    are actually accessed.
+    """
+    __slots__ = ('_data', '_rows', 'pp', 'acc', 'mods', 'diff_ids')
+
+    def __init__(self, data: list[dict]):
+        self._data = data
+        self._rows: list[Optional[Score]] = [None] * len(data)
+
+        self.pp = array('d', [s['pp'] for s in data])
+        self.acc = array('d', [s['acc'] for s in data])
+        self.mods = array('q', [s['mods'] for s in data])
+        self.diff_ids = array('q', [s['beatmap']['id'] for s in data])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        score = self._rows[index]
+        if score is None:
+            score = self._rows[index] = Score(self._data[index])
+        return score
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def request_key(endpoint, params=None) -> tuple:
+    # Returns a hashable key identifying a request
+    # names are case-insensitive on the server
+    return (endpoint,) + tuple(sorted(
+        (k, str(v).lower()) for k, v in (params or {}).items()
+    ))
+
+
+class GfgClient:
+    """
+    A long-lived, connection-pooled HTTP client for the osu!Goldfish API.
+
+    open() and close() follow the bot's lifecycle so every command reuses
+    the same keep-alive connections instead of blocking on a new one.
+
+    Concurrent calls for the same request share a single in-flight
+    request (single-flight) instead of each sending their own.
+    """
+
+    def __init__(self,
+                 timeout: float = GFG_API_TIMEOUT,
+                 max_connections: int = GFG_API_MAX_CONNECTIONS):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        self._in_flight: dict[tuple, asyncio.Task] = {}
+        self.requests_sent = 0
+        self.requests_merged = 0
+
+        # rate limiting, retries and a circuit breaker for the server
+        self.backend = Backend('osu!Goldfish', rate=10, burst=20)
+
+    def stats(self) -> dict:
+        return {
+            'in_flight': len(self._in_flight),
+            'sent': self.requests_sent,
+            'merged': self.requests_merged,
+            'backend': self.backend.stats()
+        }
+
+    async def open(self) -> None:
+        if self.session and not self.session.closed:
+            return
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=60
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'Accept-Encoding': 'gzip, deflate'}
+        )
+
+    async def close(self) -> None:
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def get(self,
+                  endpoint: str,
+                  params: dict = None,
+                  timeout: float = None) -> dict:
+        """
+        Return the decoded JSON response for <endpoint> and <params>.
+
+        Raise aiohttp.ClientResponseError if the API responds with an
+        error status (e.g. 404 for an unknown player), or
+        BackendUnavailable if the server has been failing recently.
+        """
+        key = request_key(endpoint, params)
+        task = self._in_flight.get(key)
+
+        if task:
+            self.requests_merged += 1
+        else:
+            self.requests_sent += 1
+            task = asyncio.create_task(self._get(endpoint, params, timeout))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # one caller giving up (e.g. its command was cancelled)
+        # mustn't cancel the request for everyone else
+        return await asyncio.shield(task)
+
+    async def _get(self,
+                   endpoint: str,
+                   params: Optional[dict],
+                   timeout: Optional[float]) -> dict:
+        if not self.session:
+            await self.open()
+
+        return await self.backend.call(
+            lambda: self._request(endpoint, params, timeout)
+        )
+
+    async def _request(self,
+                       endpoint: str,
+                       params: Optional[dict],
+                       timeout: Optional[float]) -> dict:
+        async with self.session.get(
+            API_URL + endpoint,
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=timeout or self.timeout)
+        ) as r:
+            r.raise_for_status()
+            return await r.json()
+
+
+client = GfgClient()
+cache = TTLCache(maxsize=GFG_API_CACHE_SIZE)
+
+
+async def api_get(endpoint, params=None, timeout=None) -> dict:
     # Returns the response for the given endpoint and parameters
-    r = requests.get(API_URL + endpoint, params=params)
-    # does this do anything ?
-    r.raise_for_status()
-    return r
+    return await client.get(endpoint, params, timeout)
+
 
+async def cached_api_get(endpoint, params) -> dict:
+    # Same as api_get, but served from <cache> while fresh (see CACHE_TTLS)
+    ttl, stale_ttl = CACHE_TTLS[endpoint, params['scope']]
+    return await cache.get(
+        request_key(endpoint, params),
+        lambda: api_get(endpoint, params),
+        ttl,
+        stale_ttl
+    )
 
-def get_player_count():
+
+async def read_db(query):
+    # Returns the result of a gfg_db query,
+    # or None if the database can't be reached so the API is used instead
+    try:
+        return await query
+    except (pymysql.err.MySQLError, OSError):
+        return None
+
+
+async def get_player_count():
     # Returns number of players online
-    res = api_get('get_player_count').json()
+    res = await api_get('get_player_count')
     return res['counts']
 
 
-def get_player_info(uid=None, name=None, mode=0) -> User:
+async def get_player_info(uid=None, name=None, mode=0) -> User:
     # Returns player stats for the given gamemode
-    json = ''
-    if uid:
-        json = api_get('get_player_info', {
-                       'id': uid, 'scope': 'all'}).json()
+    json = None
+    if GFG_READ_BACKEND == 'mysql':
+        json = await read_db(fetch_player_info(uid, name, mode))
+
+    # scope=all returns every mode, so one cached response serves them all
+    if json is not None:
+        pass  # found in the database
+    elif uid:
+        json = await cached_api_get('get_player_info', {
+                                    'id': uid, 'scope': 'all'})
     elif name:
-        json = api_get('get_player_info', {
-                       'name': name, 'scope': 'all'}).json()
+        json = await cached_api_get('get_player_info', {
+                                    'name': name, 'scope': 'all'})
     else:
         raise ValueError
 
     player = User(json['player']['info'])
-    stats = UserStats(str(mode), json['player']['stats'][str(mode)])
-    player.add_stats(stats)
+    player.all_stats = json['player']['stats']
+    player.add_stats(player.stats_for(mode))
     return player
 
 
-def get_player_scores(uid=None, name=None, scope='recent', mode=0, limit=25) \
-        -> list[Score]:
+async def get_player_scores(uid=None, name=None, scope='recent', mode=0,
+                            limit=25) -> ScoreBatch:
     # Returns a list of player scores
     # Scope can be 'recent' or 'best'
+    if GFG_READ_BACKEND == 'mysql':
+        scores = await read_db(
+            fetch_player_scores(uid, name, scope, mode, limit)
+        )
+        if scores is not None:
+            return ScoreBatch(scores)
+
     json = ''
     if uid:
-        json = api_get(
+        json = await cached_api_get(
             'get_player_scores',
             {
                 'id': uid,
@@ -136,9 +399,9 @@ def get_player_scores(uid=None, name=None, scope='recent', mode=0, limit=25) \
                 'mode': mode,
                 'limit': limit
             }
-        ).json()
+        )
     elif name:
-        json = api_get(
+        json = await cached_api_get(
             'get_player_scores',
             {
                 'name': name,
@@ -146,13 +409,91 @@ def get_player_scores(uid=None, name=None, scope='recent', mode=0, limit=25) \
                 'mode': mode,
                 'limit': limit
             }
-        ).json()
+        )
     else:
         raise ValueError
-    scores = []
-    for score in json['scores']:
-        scores.append(Score(score))
-    return scores
+    return ScoreBatch(json['scores'])
+
+
+class ScoreFeed:
+    """
+    A player's scores, fetched in chunks as they're needed.
+
+    The API has no offset, so each chunk is fetched by asking for a bigger
+    <limit> (at least double the last one) and keeping the whole response.
+    Everything fetched so far stays around for the life of the feed.
+    """
+
+    def __init__(self, uid=None, name=None, scope='recent', mode=0,
+                 chunk_size=5, max_scores=25):
+        self.uid = uid
+        self.name = name
+        self.scope = scope
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.max_scores = max_scores
+
+        self._scores = ScoreBatch([])
+        self._limit = 0
+        self._loading: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    @property
+    def exhausted(self) -> bool:
+        # the last response came back short, or we can't ask for more
+        return (self._limit >= self.max_scores
+                or len(self._scores) < self._limit)
+
+    def page_count(self, per_page: int) -> Optional[int]:
+        """Return the number of pages, or None if that isn't known yet."""
+        if not self.exhausted:
+            return None
+        return (len(self._scores) + per_page - 1) // per_page
+
+    def _next_limit(self, count: int) -> int:
+        chunks = (count + self.chunk_size - 1) // self.chunk_size
+        return min(self.max_scores,
+                   max(chunks * self.chunk_size, self._limit * 2))
+
+    async def _load(self, limit: int) -> None:
+        scores = await get_player_scores(self.uid, self.name, self.scope,
+                                         self.mode, limit)
+        if limit > self._limit:
+            self._scores = scores
+            self._limit = limit
+
+    def _start_load(self, count: int) -> asyncio.Task:
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.create_task(
+                self._load(self._next_limit(count))
+            )
+        return self._loading
+
+    async def fetch(self, count: int) -> None:
+        """Load the first <count> scores, if the player has that many."""
+        while len(self._scores) < count and not self.exhausted:
+            await asyncio.shield(self._start_load(count))
+
+    def prefetch(self, count: int) -> None:
+        """Start loading the first <count> scores in the background."""
+        if len(self._scores) >= count or self.exhausted:
+            return
+
+        task = self._start_load(count)
+        # a failed prefetch is retried by the next fetch
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def scores(self, start: int, stop: int) -> list[Score]:
+        """
+        Return scores <start> to <stop>.
+
+        One score past <stop> is loaded too, so it's known whether
+        there's anything after them.
+        """
+        await self.fetch(stop + 1)
+        return self._scores[start:stop]
 
 
 def calc_fc_pp():
@@ -0,0 +1,102 @@
+# Reads osu!Goldfish profiles and scores straight from its database.
+#
+# Every function returns data shaped like the matching API response, so
+# the models in utils.gfg_api can be built from either source.
+
+from typing import Optional
+
+from utils.account_registration import get_safe_name
+from utils.db import db
+
+
+MAP_COLUMNS = (
+    'id', 'set_id', 'md5', 'artist', 'title', 'version', 'creator',
+    'last_update', 'total_length', 'max_combo', 'status', 'plays', 'passes',
+    'mode', 'bpm', 'cs', 'od', 'ar', 'hp', 'diff'
+)
+
+USER_QUERY = (
+    'SELECT id, name, safe_name, priv, clan_id, country, silence_end, '
+    'donor_end, creation_time, latest_activity '
+    'FROM users WHERE {} = %s'
+)
+
+# the server only ranks unrestricted players with some pp
+RANK_QUERY = (
+    'SELECT COUNT(*) + 1 FROM stats o JOIN users u ON u.id = o.id '
+    'WHERE o.mode = s.mode AND o.pp > s.pp AND u.priv & 1'
+)
+
+# ranks take a count over the whole leaderboard,
+# so they're only worked out for the mode that was asked for
+STATS_QUERY = (
+    'SELECT s.id, s.mode, s.tscore, s.rscore, s.pp, s.plays, s.playtime, '
+    's.acc, s.max_combo, s.total_hits, s.replay_views, s.xh_count, '
+    's.x_count, s.sh_count, s.s_count, s.a_count, '
+    'CASE WHEN s.mode != %s THEN NULL WHEN s.pp = 0 THEN 0 '
+    f'ELSE ({RANK_QUERY}) END AS `rank`, '
+    'CASE WHEN s.mode != %s THEN NULL WHEN s.pp = 0 THEN 0 '
+    f'ELSE ({RANK_QUERY} AND u.country = %s) END AS country_rank '
+    'FROM stats s WHERE s.id = %s'
+)
+
+SCORES_QUERY = (
+    'SELECT t.id, t.score, t.pp, t.acc, t.max_combo, t.mods, t.n300, '
+    't.n100, t.n50, t.nmiss, t.grade, t.status, t.mode, t.play_time, '
+    't.time_elapsed, t.perfect, '
+    + ', '.join(f'b.{c} AS map_{c}' for c in MAP_COLUMNS) + ' '
+    'FROM scores t JOIN maps b ON b.md5 = t.map_md5 '
+    'WHERE t.userid = {} AND t.mode = %s {} '
+    'LIMIT %s'
+)
+
+SCOPES = {
+    'recent': 'ORDER BY t.play_time DESC',
+    'best': 'AND t.status = 2 AND b.status IN (2, 3) ORDER BY t.pp DESC'
+}
+
+
+async def fetch_player_info(uid=None, name=None, mode=0) -> Optional[dict]:
+    # Returns the same JSON as get_player_info with scope=all (but with
+    # ranks for <mode> only), or None if there's no such player
+    if uid:
+        info = await db.fetchone(USER_QUERY.format('id'), [uid])
+    elif name:
+        info = await db.fetchone(USER_QUERY.format('safe_name'),
+                                 [get_safe_name(name)])
+    else:
+        raise ValueError
+
+    if info is None:
+        return None
+
+    stats = await db.fetchall(STATS_QUERY,
+                              [mode, mode, info['country'], info['id']])
+    return {
+        'player': {
+            'info': info,
+            'stats': {str(row['mode']): row for row in stats}
+        }
+    }
+
+
+async def fetch_player_scores(uid=None, name=None, scope='recent', mode=0,
+                              limit=25) -> list[dict]:
+    # Returns the same `scores` array as get_player_scores
+    if uid:
+        user_id, args = '%s', [uid]
+    elif name:
+        user_id = '(SELECT id FROM users WHERE safe_name = %s)'
+        args = [get_safe_name(name)]
+    else:
+        raise ValueError
+
+    rows = await db.fetchall(
+        SCORES_QUERY.format(user_id, SCOPES[scope]),
+        args + [mode, limit]
+    )
+
+    for row in rows:
+        row['beatmap'] = {c: row.pop(f'map_{c}') for c in MAP_COLUMNS}
+
+    return rows
@@ -1,10 +1,100 @@
-def find_user(server_accs: dict[str, dict], discord_id: int) -> str:
+from typing import Optional
+
+from utils.storage import Storage, storage
+
+
+class AccountRegistry:
     """
-    Search <server_accs> and return the username
-    associated with <discord_id>.
+    osu!Goldfish accounts linked to Discord users, indexed by safe name,
+    Discord ID and email.
+
+    The indexes are loaded from <storage> on first use and every change
+    is written through to it, so nothing else should touch account links.
     """
-    for username in server_accs:
-        if server_accs[username]['discord_id'] == discord_id:
-            return username
 
-    raise LookupError
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        self._by_name: Optional[dict[str, dict]] = None
+        self._by_discord_id: dict[int, str] = {}
+        self._by_email: dict[str, str] = {}
+
+        # names and emails of registrations that are still in progress
+        self._reserved_names: set[str] = set()
+        self._reserved_emails: set[str] = set()
+
+    def _index(self, safe_name: str, acc: dict) -> None:
+        self._by_name[safe_name] = acc
+        self._by_discord_id[acc['discord_id']] = safe_name
+        self._by_email[acc['email']] = safe_name
+
+    def _accounts(self) -> dict[str, dict]:
+        if self._by_name is None:
+            self._by_name = {}
+            for safe_name, acc in self.storage.accounts().items():
+                self._index(safe_name, acc)
+
+        return self._by_name
+
+    def __contains__(self, safe_name: str) -> bool:
+        return safe_name in self._accounts()
+
+    def __len__(self) -> int:
+        return len(self._accounts())
+
+    def find_user(self, discord_id: int) -> str:
+        """Return the safe name of the account linked to <discord_id>."""
+        self._accounts()
+        return self._by_discord_id[discord_id]  # KeyError is a LookupError
+
+    def discord_id(self, safe_name: str) -> int:
+        """Return the Discord ID linked to the account <safe_name>."""
+        return self._accounts()[safe_name]['discord_id']
+
+    def name_taken(self, safe_name: str) -> bool:
+        return (safe_name in self._accounts()
+                or safe_name in self._reserved_names)
+
+    def email_taken(self, email: str) -> bool:
+        self._accounts()
+        return email in self._by_email or email in self._reserved_emails
+
+    def reserve(self, safe_name: str, email: str) -> None:
+        """
+        Hold <safe_name> and <email> for a registration in progress, so
+        no one else can take them until it's released.
+        """
+        self._reserved_names.add(safe_name)
+        self._reserved_emails.add(email)
+
+    def release(self, safe_name: str, email: str) -> None:
+        self._reserved_names.discard(safe_name)
+        self._reserved_emails.discard(email)
+
+    def register(self, safe_name: str, discord_id: int, email: str) -> None:
+        """Link the new account <safe_name> to <discord_id>."""
+        if safe_name in self:
+            self.remove(safe_name)
+
+        self.storage.add_account(safe_name, discord_id, email)
+        self._index(safe_name, {'discord_id': discord_id, 'email': email})
+
+    def rename(self, safe_old_name: str, safe_new_name: str) -> None:
+        """Move the account <safe_old_name> to <safe_new_name>."""
+        acc = self._accounts()[safe_old_name]
+
+        self.storage.rename_account(safe_old_name, safe_new_name)
+        del self._by_name[safe_old_name]
+        self._index(safe_new_name, acc)
+
+    def remove(self, safe_name: str) -> None:
+        """Unlink the account <safe_name>."""
+        acc = self._accounts().pop(safe_name)
+
+        self.storage.delete_account(safe_name)
+        if self._by_discord_id.get(acc['discord_id']) == safe_name:
+            del self._by_discord_id[acc['discord_id']]
+        if self._by_email.get(acc['email']) == safe_name:
+            del self._by_email[acc['email']]
+
+
+server_accs = AccountRegistry(storage)
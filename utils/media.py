@@ -0,0 +1,92 @@
+import time
+from typing import Awaitable, Callable, NamedTuple, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import discord
+
+from utils.assets import AssetManager, assets
+
+
+class _Upload(NamedTuple):
+    url: str
+    expires_at: float  # unix time
+    message_id: int
+
+
+class MediaSender:
+    """
+    Send assets by uploading each one only once.
+
+    The CDN URL of an asset's first upload is remembered by the asset's
+    content hash, and later sends post that link (which Discord embeds
+    like the upload) instead of the whole file. Attachment URLs are signed
+    and expire, so an asset is uploaded again once its link is within
+    <expiry_margin> seconds of expiring, or if the message holding the
+    upload is deleted.
+    """
+
+    # attachment URLs without an expiry are assumed to last this long
+    DEFAULT_TTL = 12 * 60 * 60
+
+    def __init__(self, assets: AssetManager, expiry_margin: float = 3600):
+        self.assets = assets
+        self.expiry_margin = expiry_margin
+        self._uploads: dict[bytes, _Upload] = {}
+
+        self.uploads = 0
+        self.links = 0
+
+    def _url_expiry(self, url: str) -> float:
+        # the `ex` query parameter is the expiry time in hex
+        ex = parse_qs(urlsplit(url).query).get('ex')
+        if ex:
+            return int(ex[0], 16)
+        return time.time() + self.DEFAULT_TTL
+
+    async def send(self,
+                   send: Callable[..., Awaitable[discord.Message]],
+                   path: str,
+                   digest: Optional[bytes] = None,
+                   **kwargs) -> discord.Message:
+        """
+        Send the asset at <path> with <send> (e.g. channel.send or
+        message.reply), passing it any other <kwargs>.
+
+        Give the asset's sha256 <digest> if it's already known (e.g. from
+        its name) to send it straight from disk instead of through the
+        asset cache.
+        """
+        cache = digest is None
+        if cache:
+            digest = self.assets.digest(path)
+        upload = self._uploads.get(digest)
+
+        if upload and upload.expires_at - time.time() > self.expiry_margin:
+            self.links += 1
+            return await send(upload.url, **kwargs)
+
+        message = await send(file=self.assets.file(path, cache=cache),
+                             **kwargs)
+        self.uploads += 1
+
+        if message.attachments:
+            url = message.attachments[0].url
+            self._uploads[digest] = _Upload(url, self._url_expiry(url),
+                                            message.id)
+        return message
+
+    def forget_message(self, message_id: int) -> None:
+        """Stop linking to uploads in the deleted message <message_id>."""
+        for digest, upload in list(self._uploads.items()):
+            if upload.message_id == message_id:
+                del self._uploads[digest]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'cached': len(self._uploads),
+            'uploads': self.uploads,
+            'links': self.links
+        }
+
+
+media = MediaSender(assets)
@@ -1,35 +1,49 @@
+import re
+
 import discord
 from discord import app_commands
+from discord.app_commands import Choice
 from discord.ext import commands
 
+from utils.member_index import member_indexes
+
+
+MENTION_OR_ID = re.compile(r'<@!?[0-9]{15,20}>$|[0-9]{15,20}$')
+
 
 class MemberConv(commands.Converter, app_commands.Transformer):
-    """Ease searching members in hybrid commands."""
+    """
+    Ease searching members in hybrid commands.
+
+    Names are looked up in the guild's member index (see
+    utils.member_index), which also autocompletes the slash command
+    option; its values are member IDs.
+    """
     @property
-    def type(self) -> discord.AppCommandOptionType.user:
-        return discord.AppCommandOptionType.user
+    def type(self) -> discord.AppCommandOptionType.string:
+        return discord.AppCommandOptionType.string
 
     # App command
     async def transform(self, interaction, value):
-        return value
+        if value.isdigit():  # picked from the autocomplete
+            member = interaction.guild.get_member(int(value))
+            if member:
+                return member
+        return member_indexes.find(interaction.guild, value)
+
+    async def autocomplete(self, interaction, value):
+        return [
+            Choice(name=f'{member.display_name} ({member.name})'[:100],
+                   value=str(member.id))
+            for member in member_indexes.search(interaction.guild, value)
+        ]
 
     # Chat command
     async def convert(self, ctx, argument):
+        if not MENTION_OR_ID.match(argument):
+            return member_indexes.find(ctx.guild, argument)
+
         try:
             return await commands.MemberConverter().convert(ctx, argument)
         except commands.MemberNotFound:
-            check = argument.lower()
-
-            # Search username
-            member = discord.utils.find(
-                lambda m: m.name.lower().startswith(check), ctx.guild.members
-            )
-
-            if not member:
-                # Search nickname
-                member = discord.utils.find(
-                    lambda m: m.display_name.lower().startswith(check),
-                    ctx.guild.members
-                )
-
-            return member
+            return None
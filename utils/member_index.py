@@ -0,0 +1,160 @@
+import bisect
+import difflib
+from itertools import islice
+from typing import Optional
+
+import discord
+
+
+def _names(member: discord.Member) -> tuple[tuple[int, str], ...]:
+    # (rank, lowercased name) for the username (0), global name (1) and
+    # nickname (2), skipping missing names and repeats of earlier ones
+    names = []
+    seen = set()
+    for rank, name in enumerate((member.name, member.global_name,
+                                 member.nick)):
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append((rank, name.lower()))
+    return tuple(names)
+
+
+class MemberIndex:
+    """
+    The names of one guild's members, lowercased, in a sorted array of
+    (name, rank, member ID) for binary search by prefix.
+
+    <rank> is 0 for a username, 1 for a global name and 2 for a
+    nickname. It has to be kept in step with the guild through add()
+    and remove() as members join, leave and change names.
+    """
+
+    # stop ranking prefix matches after this many, e.g. for 'a'
+    MAX_SCAN = 1000
+
+    def __init__(self, members: list[discord.Member] = ()):
+        self._entries: list[tuple[str, int, int]] = sorted(
+            (name, rank, member.id)
+            for member in members
+            for rank, name in _names(member)
+        )
+        self._names: dict[int, tuple[tuple[int, str], ...]] = {
+            member.id: _names(member) for member in members
+        }
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, member: discord.Member) -> None:
+        """Add <member>, or update their names if they're already here."""
+        names = _names(member)
+        if self._names.get(member.id) == names:
+            return
+
+        self.remove(member.id)
+        for rank, name in names:
+            bisect.insort(self._entries, (name, rank, member.id))
+        self._names[member.id] = names
+
+    def remove(self, member_id: int) -> None:
+        for rank, name in self._names.pop(member_id, ()):
+            i = bisect.bisect_left(self._entries, (name, rank, member_id))
+            del self._entries[i]
+
+    def search(self, query: str, limit: int = 25) -> list[int]:
+        """
+        Return the IDs of up to <limit> members whose names best match
+        <query>: names starting with it first (exact matches, then
+        usernames before global names before nicknames, then the shortest
+        names), then the most similar names with the same first letter.
+        """
+        query = query.lower()
+        ranked = {}  # member ID -> best (score) of their matching names
+
+        start = bisect.bisect_left(self._entries, (query,))
+        for name, rank, member_id in islice(self._entries, start,
+                                            start + self.MAX_SCAN):
+            if not name.startswith(query):
+                break
+
+            score = (name != query, rank, len(name))
+            if member_id not in ranked or score < ranked[member_id]:
+                ranked[member_id] = score
+
+        results = sorted(ranked, key=ranked.get)[:limit]
+        if len(results) == limit or not query:
+            return results
+
+        # nothing (or not enough) starts with <query>; try typos instead,
+        # only among names with the same first character to keep it quick
+        names = {}  # name -> member IDs
+        start = bisect.bisect_left(self._entries, (query[0],))
+        for name, _, member_id in islice(self._entries, start, None):
+            if name[0] != query[0]:
+                break
+            names.setdefault(name, []).append(member_id)
+
+        for name in difflib.get_close_matches(query, names, n=limit):
+            for member_id in names[name]:
+                if member_id not in ranked and len(results) < limit:
+                    ranked[member_id] = None
+                    results.append(member_id)
+
+        return results
+
+
+class MemberIndexes:
+    """
+    A MemberIndex per guild, built from the member cache on first use
+    and then kept up to date from member events (see bot.py).
+    """
+
+    def __init__(self):
+        self._guilds: dict[int, MemberIndex] = {}
+
+    def index(self, guild: discord.Guild) -> MemberIndex:
+        index = self._guilds.get(guild.id)
+        if index is None:
+            index = MemberIndex(guild.members)
+            # joins are the only updates for members that aren't cached
+            # yet, so an index of a partial member list can't be kept
+            if guild.chunked:
+                self._guilds[guild.id] = index
+        return index
+
+    def search(self,
+               guild: discord.Guild,
+               query: str,
+               limit: int = 25) -> list[discord.Member]:
+        """Return up to <limit> members of <guild> matching <query>."""
+        members = (guild.get_member(member_id)
+                   for member_id in self.index(guild).search(query, limit))
+        return [member for member in members if member]
+
+    def find(self,
+             guild: discord.Guild,
+             query: str) -> Optional[discord.Member]:
+        """Return the member of <guild> that best matches <query>."""
+        members = self.search(guild, query, limit=1)
+        return members[0] if members else None
+
+    # member events; guilds that haven't been searched yet are skipped
+    def on_member_join(self, member: discord.Member) -> None:
+        if member.guild.id in self._guilds:
+            self._guilds[member.guild.id].add(member)
+
+    def on_member_remove(self, member: discord.Member) -> None:
+        if member.guild.id in self._guilds:
+            self._guilds[member.guild.id].remove(member.id)
+
+    on_member_update = on_member_join  # e.g. a new nickname
+
+    def on_user_update(self, user: discord.User) -> None:
+        # a new username or global name, in every guild the user is in
+        for guild in user.mutual_guilds:
+            member = guild.get_member(user.id)
+            if member and guild.id in self._guilds:
+                self._guilds[guild.id].add(member)
+
+
+member_indexes = MemberIndexes()
@@ -0,0 +1,5 @@
+def percentile(values: list[float], p: float) -> float:
+    """Return the <p> (0 to 1) percentile of the sorted <values>, or 0."""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(p * len(values)))]
@@ -1,10 +1,7 @@
 from typing import Optional
 
-from env import VM_OSU_CACHE_DIR, MYSQL_USERNAME, MYSQL_PW, OSUGFG_DB_NAME
-from jsons import read_json, write_json
-
-from utils.gfg_api import Score, get_player_info, get_player_scores
-from utils.gfg_server_accs import find_user
+from utils.gfg_api import Score, ScoreFeed, User, get_player_info
+from utils.gfg_server_accs import server_accs
 from utils.account_registration import get_safe_name, username_re
 from utils.paginator import Paginator, reply_paginator
 from utils.emojis import (
@@ -18,12 +15,13 @@ from utils.emojis import (
     RANKING_D,
     RANKING_F
 )
-from rosu_pp_py import Beatmap, Calculator
-import aiomysql
+from utils.difficulty_engine import difficulty_engine
+from utils.pipeline import Pipeline
+from utils.db import db
 
 import discord
 from discord.ext.commands import Context
-from requests.exceptions import HTTPError
+from aiohttp import ClientResponseError
 
 
 modes = [  # convenient mode indexing for functions that need it
@@ -66,22 +64,26 @@ def calc_map_completion(score: Score) -> float:
     return score.time_elapsed / 1000 / score.beatmap.length * 100
 
 
-def calc_star_rating(mode: int, score: Score) -> float:
+async def load_first_page(pipeline: Pipeline,
+                          username: str,
+                          user_scores: ScoreFeed,
+                          per_page: int,
+                          mode: int) -> User:
     """
-    Calculate the star rating of the map associated with <score>
-    with <score>'s mods applied.
+    Fetch <username>'s profile and the first page of <user_scores> at the
+    same time, warming up the star ratings of that page as soon as its
+    scores arrive. Return the profile.
     """
-    try:
-        map = Beatmap(path=f'{VM_OSU_CACHE_DIR}/{score.beatmap.diff_id}.osu')
-    except Exception:  # should be a ParseError when testing locally
-        # can't catch directly because the error is defined in Rust :(
-        return score.beatmap.star_rating
-
-    calc = Calculator(
-        mode=(0 if mode == 4 else mode),  # treat relax as standard
-        mods=score.mods.value
+    async def first_page():
+        scores = await user_scores.scores(0, per_page)
+        await pipeline.step('warmup',
+                            difficulty_engine.star_ratings(mode, scores))
+
+    results = await pipeline.gather(
+        profile=get_player_info(name=username),
+        scores=first_page()
     )
-    return calc.difficulty(map).stars
+    return results['profile']
 
 
 async def process_recent_scores(ctx: Context,
@@ -89,21 +91,23 @@ async def process_recent_scores(ctx: Context,
                                 mode: int) -> None:
     """Get an osu!Goldfish user's most recent scores."""
     if not username:  # search for the user's account
-        server_accs = read_json('server_accs.json')
         try:
-            username = find_user(server_accs, ctx.author.id)
+            username = server_accs.find_user(ctx.author.id)
         except LookupError:
             await ctx.reply('You are not registered on osu!Goldfish.')
             return
 
+    # only fetch as many scores as the pages being looked at need
+    user_scores = ScoreFeed(name=username, mode=mode,
+                            chunk_size=5, max_scores=25)
     try:
-        user = get_player_info(name=username)
-    except HTTPError:
+        user = await load_first_page(Pipeline('recent'), username,
+                                     user_scores, 1, mode)
+    except ClientResponseError:
         await ctx.reply('User not found.')
         return
 
-    user_scores = get_player_scores(name=user.name, mode=mode)
-    if not user_scores:
+    if not len(user_scores):
         await ctx.reply(
             content=(
                 f'``{user.name}`` has no recent {modes[mode]} plays '
@@ -113,9 +117,13 @@ async def process_recent_scores(ctx: Context,
         )
         return
 
-    pages: list[discord.Embed] = []
+    async def render_page(index: int) -> discord.Embed:
+        score, = await user_scores.scores(index, index + 1)
+        paginator.page_count = user_scores.page_count(1)
+        user_scores.prefetch(index + 3)  # enough for the next page
+
+        star_rating, = await difficulty_engine.star_ratings(mode, [score])
 
-    for score in user_scores:
         completion = (
             f' ({calc_map_completion(score):.2f}%)' if score.grade == 'F'
             else ''
@@ -139,7 +147,7 @@ async def process_recent_scores(ctx: Context,
             name=(
                 f'{score.beatmap.title} [{score.beatmap.difficulty}] '
                 f'+{score.mods.short_name()} '
-                f'[{calc_star_rating(mode, score):.2f}★]'
+                f'[{star_rating:.2f}★]'
             ),
             url=f'https://osu.ppy.sh/b/{score.beatmap.diff_id}',
             icon_url=f'https://a.victoryu.dev/{user.id}'
@@ -154,10 +162,11 @@ async def process_recent_scores(ctx: Context,
         )
         em.set_footer(text=footer)
 
-        pages.append(em)
+        return em
 
+    paginator = Paginator(page_factory=render_page, show_index=False)
     await reply_paginator(
-        paginator=Paginator(pages=pages, show_index=False),
+        paginator=paginator,
         ctx=ctx,
         content=f'**Recent {modes[mode]} Play for {user.name}:**'
     )
@@ -168,26 +177,22 @@ async def process_best_scores(ctx: Context,
                               mode: int) -> None:
     """Get an osu!Goldfish user's top plays."""
     if not username:  # search for the user's account
-        server_accs = read_json('server_accs.json')
         try:
-            username = find_user(server_accs, ctx.author.id)
+            username = server_accs.find_user(ctx.author.id)
         except LookupError:
             await ctx.reply('You are not registered on osu!Goldfish.')
             return
 
+    user_scores = ScoreFeed(name=username, mode=mode, scope='best',
+                            chunk_size=15, max_scores=100)
     try:
-        user = get_player_info(name=username)
-    except HTTPError:
+        user = await load_first_page(Pipeline('best'), username,
+                                     user_scores, 5, mode)
+    except ClientResponseError:
         await ctx.reply('User not found.')
         return
 
-    user_scores = get_player_scores(
-        name=user.name,
-        mode=mode,
-        scope='best',
-        limit=100
-    )
-    if not user_scores:
+    if not len(user_scores):
         await ctx.reply(
             content=(
                 f'``{user.name}`` has no {modes[mode]} plays '
@@ -197,20 +202,23 @@ async def process_best_scores(ctx: Context,
         )
         return
 
-    # partition into groups of 5 (so we can show 5 scores per page)
-    partitions = [user_scores[i:i+5] for i in range(0, len(user_scores), 5)]
-    pages: list[discord.Embed] = []
+    async def render_page(index: int) -> discord.Embed:
+        # 5 scores per page
+        partition = await user_scores.scores(index * 5, index * 5 + 5)
+        paginator.page_count = user_scores.page_count(5)
+        user_scores.prefetch(index * 5 + 11)  # enough for the next page
+
+        star_ratings = await difficulty_engine.star_ratings(mode, partition)
 
-    idx = 1
-    for partition in partitions:
         description = ''
-        for score in partition:
+        for i, (score, star_rating) in enumerate(zip(partition,
+                                                     star_ratings)):
             description += (
-                f'**{idx}) '
+                f'**{index * 5 + i + 1}) '
                 f'[{score.beatmap.title} [{score.beatmap.difficulty}]]'
                 f'(https://osu.ppy.sh/b/{score.beatmap.diff_id}) '
                 f'+{score.mods.short_name()}** '
-                f'[{calc_star_rating(mode, score):.2f}★]\n'
+                f'[{star_rating:.2f}★]\n'
 
                 f'▸ {get_grade_emoji(score.grade)} ▸ **{score.pp:.2f}pp** '
                 f'▸ {score.acc:.2f}%\n'
@@ -221,7 +229,6 @@ async def process_best_scores(ctx: Context,
 
                 f'▸ Score set <t:{int(score.play_time.timestamp())}:R>\n'
             )
-            idx += 1
 
         em = discord.Embed(
             description=description,
@@ -237,30 +244,26 @@ async def process_best_scores(ctx: Context,
         em.set_thumbnail(url=f'https://a.victoryu.dev/{user.id}')
         em.set_footer(text='On osu!Goldfish server')
 
-        pages.append(em)
+        return em
 
-    await reply_paginator(
-        paginator=Paginator(pages=pages),
-        ctx=ctx
-    )
+    paginator = Paginator(page_factory=render_page)
+    await reply_paginator(paginator=paginator, ctx=ctx)
 
 
 async def process_profile(ctx: Context,
                           username: Optional[str],
                           mode: int) -> None:
     """Get an osu!Goldfish user's profile and statistics."""
-    server_accs = read_json('server_accs.json')
-
     if not username:  # search for the user's account
         try:
-            username = find_user(server_accs, ctx.author.id)
+            username = server_accs.find_user(ctx.author.id)
         except LookupError:
             await ctx.reply('You are not registered on osu!Goldfish.')
             return
 
     try:
-        user = get_player_info(name=username, mode=mode)
-    except HTTPError:
+        user = await get_player_info(name=username, mode=mode)
+    except ClientResponseError:
         await ctx.reply('User not found.')
         return
 
@@ -269,7 +272,7 @@ async def process_profile(ctx: Context,
             f'▸ **Goldfish Rank:** #{user.stats.rank}\n'
 
             f'▸ **Discord:** '
-            f'<@{server_accs[get_safe_name(user.name)]["discord_id"]}>\n'
+            f'<@{server_accs.discord_id(get_safe_name(user.name))}>\n'
 
             f'▸ **PP:** {int(user.stats.pp):,} '
             f'**Accuracy:** {float(user.stats.acc):.2f}%\n'
@@ -304,10 +307,8 @@ async def process_profile(ctx: Context,
 async def process_name_change(ctx: Context,
                               new_name: str) -> None:
     """Change a user's name on osu!Goldfish."""
-    server_accs = read_json('server_accs.json')
-
     try:
-        safe_old_name = find_user(server_accs, ctx.author.id)
+        safe_old_name = server_accs.find_user(ctx.author.id)
     except LookupError:
         await ctx.reply('You are not registered on osu!Goldfish.')
         return
@@ -322,29 +323,19 @@ async def process_name_change(ctx: Context,
 
     safe_new_name = get_safe_name(new_name)
 
-    if safe_new_name in server_accs:
+    if server_accs.name_taken(safe_new_name):
         await ctx.reply('Username already taken by another user.')
         return
 
     # update the database
-    async with aiomysql.connect(
-        host='localhost',
-        user=MYSQL_USERNAME,
-        password=MYSQL_PW,
-        db=OSUGFG_DB_NAME
-    ) as conn:
-        async with conn.cursor() as cur:
-            await cur.execute(
-                'UPDATE users '
-                'SET name = %s, safe_name = %s '
-                'WHERE safe_name = %s',
-                [new_name, safe_new_name, safe_old_name]
-            )
-            await conn.commit()
+    await db.execute(
+        'UPDATE users '
+        'SET name = %s, safe_name = %s '
+        'WHERE safe_name = %s',
+        [new_name, safe_new_name, safe_old_name]
+    )
 
-    # replace the old name with safe_new_name in the json
-    server_accs[safe_new_name] = server_accs.pop(safe_old_name)
-    write_json('server_accs.json', server_accs)
+    server_accs.rename(safe_old_name, safe_new_name)
 
     await ctx.reply(
         f'Your osu!Goldfish username has been changed to **{new_name}**!'
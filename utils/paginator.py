@@ -1,32 +1,85 @@
 import discord
 from discord.ext.commands import Context
 
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
 
 class Paginator:
-    """Pagination with embeds."""
-    def __init__(self, pages: list[discord.Embed], show_index: bool = True):
-        self.pages = pages
+    """
+    Pagination with embeds.
+
+    Either give every page up front with <pages>, or give <page_count>
+    and a <page_factory> coroutine that builds the page at an index.
+    Pages are only built the first time they're viewed, and the last
+    <memo_size> of them are kept around for when the user goes back.
+
+    <page_count> may be None if the number of pages isn't known up front;
+    the factory should set it once it is.
+    """
+    def __init__(self,
+                 pages: list[discord.Embed] = None,
+                 show_index: bool = True,
+                 page_count: int = None,
+                 page_factory: Callable[[int],
+                                        Awaitable[discord.Embed]] = None,
+                 memo_size: int = 5):
+        if pages is not None:
+            page_count = len(pages)
+            page_factory = self._static_page
 
-        for i, p in enumerate(self.pages):
-            if show_index and p.footer.text:
-                # put the page number in front of any footer the embed has
-                new_footer = f'Page {i+1} of {len(self)} | {p.footer.text}'
-            elif show_index:
-                new_footer = f'Page {i+1} of {len(self)}'
-            elif p.footer.text:
-                new_footer = p.footer.text
-            else:
-                new_footer = None
+        self.pages = pages
+        self.page_count = page_count
+        self.page_factory = page_factory
+        self.show_index = show_index
 
-            p.set_footer(text=new_footer)
+        self.memo_size = memo_size
+        self._memo: OrderedDict[int, discord.Embed] = OrderedDict()
 
         self.current_index = 0
 
-    def __len__(self) -> int:
-        return len(self.pages)
-
-    def current_page(self) -> discord.Embed:
-        return self.pages[self.current_index]
+    async def _static_page(self, index: int) -> discord.Embed:
+        return self.pages[index]
+
+    def _add_footer(self, p: discord.Embed, index: int) -> discord.Embed:
+        """Return a copy of <p> with its page number in the footer."""
+        p = p.copy()
+
+        if self.page_count is None:
+            page_number = f'Page {index+1}'
+        else:
+            page_number = f'Page {index+1} of {self.page_count}'
+
+        if self.show_index and p.footer.text:
+            # put the page number in front of any footer the embed has
+            new_footer = f'{page_number} | {p.footer.text}'
+        elif self.show_index:
+            new_footer = page_number
+        elif p.footer.text:
+            new_footer = p.footer.text
+        else:
+            new_footer = None
+
+        p.set_footer(text=new_footer)
+        return p
+
+    async def current_page(self) -> discord.Embed:
+        index = self.current_index
+        page = self._memo.get(index)
+
+        if page is None:
+            page = await self.page_factory(index)
+            self._memo[index] = page
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        else:
+            self._memo.move_to_end(index)
+
+        # the page count may have changed since the page was built
+        return self._add_footer(page, index)
+
+    def is_last_page(self) -> bool:
+        return self.current_index == (self.page_count or 0) - 1
 
     def next_page(self):
         self.current_index += 1
@@ -38,7 +91,7 @@ class Paginator:
         self.current_index = 0
 
     def last_page(self):
-        self.current_index = len(self) - 1
+        self.current_index = self.page_count - 1
 
     def goto_page(self, index: int):
         self.current_index = index
@@ -56,6 +109,38 @@ class PaginatorButtons(discord.ui.View):
         self.clear_items()
         await self.message.edit(view=self)
 
+    def update_buttons(self) -> None:
+        at_start = self.paginator.current_index == 0
+        at_end = self.paginator.is_last_page()
+
+        self.first_page.disabled = at_start
+        self.prev_page.disabled = at_start
+        self.next_page.disabled = at_end
+        # can't jump to the end before knowing where it is
+        self.last_page.disabled = (
+            at_end or self.paginator.page_count is None
+        )
+
+    async def turn_page(self,
+                        interaction: discord.Interaction,
+                        move: Callable[[], None]):
+        """Show the page <move> (e.g. paginator.next_page) goes to."""
+        # building the page may fetch scores, which can take longer than
+        # the 3 seconds Discord waits for a response
+        await interaction.response.defer()
+
+        previous_index = self.paginator.current_index
+        move()
+        try:
+            embed = await self.paginator.current_page()
+        except Exception:
+            # stay on the page the user can still see
+            self.paginator.goto_page(previous_index)
+            raise
+
+        self.update_buttons()
+        await interaction.edit_original_response(embed=embed, view=self)
+
     @discord.ui.button(label='◂◂', disabled=True)
     async def first_page(self,
                          interaction: discord.Interaction,
@@ -63,17 +148,7 @@ class PaginatorButtons(discord.ui.View):
         if interaction.user != self.owner:
             return
 
-        self.paginator.first_page()
-        self.next_page.disabled = False
-        self.last_page.disabled = False
-
-        button.disabled = True
-        self.prev_page.disabled = True
-
-        await interaction.response.edit_message(
-            embed=self.paginator.current_page(),
-            view=self
-        )
+        await self.turn_page(interaction, self.paginator.first_page)
 
     @discord.ui.button(label='◂', disabled=True)
     async def prev_page(self,
@@ -82,18 +157,7 @@ class PaginatorButtons(discord.ui.View):
         if interaction.user != self.owner:
             return
 
-        self.paginator.prev_page()
-        self.next_page.disabled = False
-        self.last_page.disabled = False
-
-        if self.paginator.current_index == 0:
-            button.disabled = True
-            self.first_page.disabled = True
-
-        await interaction.response.edit_message(
-            embed=self.paginator.current_page(),
-            view=self
-        )
+        await self.turn_page(interaction, self.paginator.prev_page)
 
     @discord.ui.button(label='▸')
     async def next_page(self,
@@ -102,18 +166,7 @@ class PaginatorButtons(discord.ui.View):
         if interaction.user != self.owner:
             return
 
-        self.paginator.next_page()
-        self.prev_page.disabled = False
-        self.first_page.disabled = False
-
-        if self.paginator.current_index == len(self.paginator) - 1:
-            button.disabled = True
-            self.last_page.disabled = True
-
-        await interaction.response.edit_message(
-            embed=self.paginator.current_page(),
-            view=self
-        )
+        await self.turn_page(interaction, self.paginator.next_page)
 
     @discord.ui.button(label='▸▸')
     async def last_page(self,
@@ -122,34 +175,27 @@ class PaginatorButtons(discord.ui.View):
         if interaction.user != self.owner:
             return
 
-        self.paginator.last_page()
-        self.prev_page.disabled = False
-        self.first_page.disabled = False
-
-        button.disabled = True
-        self.next_page.disabled = True
-
-        await interaction.response.edit_message(
-            embed=self.paginator.current_page(),
-            view=self
-        )
+        await self.turn_page(interaction, self.paginator.last_page)
 
 
 async def reply_paginator(paginator: Paginator,
                           ctx: Context,
                           content: str = None):
     """Reply to <ctx> with <p>."""
-    if len(paginator) == 1:  # send without buttons
+    embed = await paginator.current_page()
+
+    if paginator.page_count == 1:  # send without buttons
         await ctx.reply(
             content=content,
-            embed=paginator.current_page(),
+            embed=embed,
             mention_author=False
         )
     else:
         view = PaginatorButtons(paginator=paginator, owner=ctx.author)
+        view.update_buttons()
         view.message = await ctx.reply(
             content=content,
-            embed=paginator.current_page(),
+            embed=embed,
             view=view,
             mention_author=False
         )
@@ -1,29 +1,20 @@
 import discord
 from discord import ui
 
-from env import MYSQL_USERNAME, MYSQL_PW, OSUGFG_DB_NAME
 from utils.account_registration import hash_password
-
-import aiomysql
+from utils.db import db
+from utils.password_hasher import HasherBusy
 
 
 async def update_pw_in_db(user_safe_name: str,
                           pw_plaintext: str):
     """Update a user's password in the osu!Goldfish database."""
-    hashed_pw = hash_password(pw_plaintext)
-
-    async with aiomysql.connect(
-        host='localhost',
-        user=MYSQL_USERNAME,
-        password=MYSQL_PW,
-        db=OSUGFG_DB_NAME
-    ) as conn:
-        async with conn.cursor() as cur:
-            await cur.execute(
-                'UPDATE users SET pw_bcrypt = %s WHERE safe_name = %s',
-                [hashed_pw, user_safe_name]
-            )
-            await conn.commit()
+    hashed_pw = await hash_password(pw_plaintext)
+
+    await db.execute(
+        'UPDATE users SET pw_bcrypt = %s WHERE safe_name = %s',
+        [hashed_pw, user_safe_name]
+    )
 
 
 class PasswordChanger(ui.Modal, title='osu!Goldfish Password Change'):
@@ -48,10 +39,20 @@ class PasswordChanger(ui.Modal, title='osu!Goldfish Password Change'):
             )
             return
 
-        await update_pw_in_db(
-            self.user_safe_name,
-            str(self.pw_plaintext)
-        )
-        await interaction.response.send_message(
-            'Password successfully changed.'
-        )
+        # hashing and the update can take longer than the 3 seconds
+        # Discord waits for a response
+        await interaction.response.defer(ephemeral=True)
+
+        try:
+            await update_pw_in_db(
+                self.user_safe_name,
+                str(self.pw_plaintext)
+            )
+        except HasherBusy:
+            await interaction.followup.send(
+                'Too many passwords are being changed right now. '
+                'Please try again in a minute.',
+                ephemeral=True
+            )
+            return
+        await interaction.followup.send('Password successfully changed.')
@@ -0,0 +1,77 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from env import BCRYPT_ROUNDS, BCRYPT_WORKERS, BCRYPT_MAX_QUEUE
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing a hash when too many are already waiting."""
+
+
+class PasswordHasher:
+    """
+    Hash passwords with bcrypt (cost factor <rounds>) in a pool of
+    <workers> threads, so the work factor never blocks the event loop.
+
+    bcrypt releases the GIL while it hashes, so threads are enough. At
+    most <max_queue> hashes may be running or waiting at a time; past
+    that, hash() raises HasherBusy instead of piling up more work.
+    """
+
+    def __init__(self, workers: int, rounds: int, max_queue: int):
+        self.workers = workers
+        self.rounds = rounds
+        self.max_queue = max_queue
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        self.pending = 0
+        self.hashed = 0
+        self.rejected = 0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if not self._pool:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='bcrypt')
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _hash(self, password: bytes) -> bytes:
+        return bcrypt.hashpw(password, bcrypt.gensalt(self.rounds))
+
+    async def hash(self, password: bytes) -> bytes:
+        """Return the bcrypt hash of <password>."""
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            raise HasherBusy
+
+        self.pending += 1
+        try:
+            hashed = await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), self._hash, password
+            )
+        finally:
+            self.pending -= 1
+
+        self.hashed += 1
+        return hashed
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'pending': self.pending,
+            'hashed': self.hashed,
+            'rejected': self.rejected
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=BCRYPT_WORKERS,
+    rounds=BCRYPT_ROUNDS,
+    max_queue=BCRYPT_MAX_QUEUE
+)
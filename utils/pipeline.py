@@ -0,0 +1,76 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable
+
+from utils.metrics import percentile
+
+
+# (pipeline name, step name) -> durations of its most recent runs
+step_timings: defaultdict[tuple[str, str], deque[float]] = defaultdict(
+    lambda: deque(maxlen=500)
+)
+
+
+class Pipeline:
+    """
+    The steps of one command run, timed individually.
+
+    Steps that don't depend on each other are started together with
+    <gather>, so the run takes as long as its slowest step rather than
+    all of them added up.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: dict[str, float] = {}
+
+    async def step(self, name: str, aw: Awaitable) -> Any:
+        """Return the result of awaiting <aw>, recording how long it took."""
+        start = time.perf_counter()
+        try:
+            result = await aw
+        except Exception:  # not CancelledError, a cut-off run isn't timed
+            self._record(name, start)
+            raise
+
+        self._record(name, start)
+        return result
+
+    def _record(self, name: str, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        self.timings[name] = elapsed
+        step_timings[self.name, name].append(elapsed)
+
+    async def gather(self, **steps: Awaitable) -> dict[str, Any]:
+        """
+        Run <steps> concurrently and return their results by name.
+
+        If a step fails the others are cancelled and its exception is
+        raised as is, so callers can handle it as if it had run alone.
+        """
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = {
+                    name: tg.create_task(self.step(name, aw))
+                    for name, aw in steps.items()
+                }
+        except BaseExceptionGroup as eg:
+            raise eg.exceptions[0]
+
+        return {name: task.result() for name, task in tasks.items()}
+
+
+def stats() -> dict[str, dict]:
+    """Return the p50 and p95 duration of every step that has run."""
+    result = {}
+
+    for (pipeline, step), durations in step_timings.items():
+        durations = sorted(durations)
+        result[f'{pipeline}.{step}'] = {
+            'runs': len(durations),
+            'p50': percentile(durations, 0.5),
+            'p95': percentile(durations, 0.95)
+        }
+
+    return result
@@ -0,0 +1,222 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+import aiohttp
+
+from utils.metrics import percentile
+
+
+T = TypeVar('T')
+
+
+class BackendUnavailable(Exception):
+    """Raised instead of calling a backend that is currently unhealthy."""
+
+    def __init__(self, backend: str, retry_after: float):
+        super().__init__(f'{backend} is unavailable')
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return whether <error> is worth retrying (rate limit or server-side)."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+
+    return isinstance(error, (aiohttp.ClientConnectionError,
+                              asyncio.TimeoutError))
+
+
+class TokenBucket:
+    """Allow <rate> calls per second on average, in bursts of <capacity>."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:  # first come, first served
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a backend after <failure_threshold> consecutive failures.
+
+    Once open, calls fail immediately for <reset_timeout> seconds; after
+    that a single trial call is let through (half-open) and its outcome
+    decides whether the circuit closes again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return 'open'
+        return 'half-open'
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0
+        return max(0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Return whether a call may go through right now."""
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half-open' and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def cancel_trial(self) -> None:
+        """Let another trial call through; the last one was abandoned."""
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+
+class Backend:
+    """
+    Rate limiting, retries with jittered exponential backoff and a
+    circuit breaker for calls to one upstream API.
+    """
+
+    def __init__(self,
+                 name: str,
+                 rate: float,
+                 burst: int,
+                 max_retries: int = 2,
+                 base_delay: float = 0.5,
+                 max_delay: float = 5,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.queued = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.latencies: deque[float] = deque(maxlen=500)
+
+    def _backoff(self, attempt: int) -> float:
+        # "full jitter": anywhere between 0 and the exponential cap
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** attempt)
+        )
+
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Return the result of awaiting <request()>, retrying it if it fails
+        with a retryable error.
+
+        Raise BackendUnavailable without calling it if the backend has been
+        failing recently.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise BackendUnavailable(self.name, self.breaker.retry_after())
+
+        self.calls += 1
+        try:
+            return await self._call(request)
+        except asyncio.CancelledError:
+            # don't leave a half-open circuit waiting on an abandoned trial
+            self.breaker.cancel_trial()
+            raise
+
+    async def _call(self, request: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+
+        while True:
+            self.queued += 1
+            try:
+                await self.bucket.acquire()
+            finally:
+                self.queued -= 1
+
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                result = await request()
+                error = None
+            except Exception as e:
+                error = e
+            finally:
+                self.in_flight -= 1
+                self.latencies.append(time.perf_counter() - start)
+
+            # a non-retryable error (e.g. a 404) means the backend is fine
+            if error is None or not is_retryable(error):
+                self.breaker.record_success()
+                if error:
+                    raise error
+                return result
+
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            self.failures += 1
+            self.breaker.record_failure()
+            raise error
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        return {
+            'state': self.breaker.state,
+            'queued': self.queued,
+            'in_flight': self.in_flight,
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'latency_p50': percentile(latencies, 0.5),
+            'latency_p95': percentile(latencies, 0.95)
+        }
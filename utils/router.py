@@ -0,0 +1,137 @@
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, Optional
+
+import discord
+
+from utils.metrics import percentile
+from utils.storage import Storage, storage
+from utils.tag_index import TagIndex
+
+
+Handler = Callable[..., Awaitable[None]]
+
+
+class MessageRouter:
+    """
+    Decide, once per message, which single handler (if any) it goes to:
+    a tag reply, a Ben response or the command parser.
+
+    Every check is against state kept in memory (a prefix, a frozenset of
+    channel IDs and a dict of tags), loaded from <storage> on first use
+    and kept in step with it through the methods below, so routing a
+    message never touches the disk.
+    """
+
+    def __init__(self, storage: Storage, prefix: str):
+        self.storage = storage
+        self.prefix = prefix
+
+        self._response_channels: Optional[frozenset[int]] = None
+        self._tags: Optional[dict[str, dict]] = None
+        self._tag_index: Optional[TagIndex] = None  # built on first use
+
+        # set by whatever handles each kind of message
+        self.on_tag: Optional[Handler] = None       # (message, name, tag)
+        self.on_question: Optional[Handler] = None  # (message)
+        self.on_command: Optional[Handler] = None   # (message)
+
+        self.routed: Counter[str] = Counter()
+        self.latencies: deque[float] = deque(maxlen=1000)
+
+    def _load(self) -> None:
+        if self._tags is None:
+            self._response_channels = frozenset(
+                self.storage.response_channels()
+            )
+            self._tags = dict(self.storage.tags())
+
+    def toggle_response_channel(self, channel_id: int) -> bool:
+        """
+        Toggle Ben responses for <channel_id> and return whether
+        they are now enabled.
+        """
+        self._load()
+        enabled = self.storage.toggle_response_channel(channel_id)
+
+        if enabled:
+            self._response_channels |= {channel_id}
+        else:
+            self._response_channels -= {channel_id}
+        return enabled
+
+    def get_tag(self, name: str) -> Optional[dict]:
+        self._load()
+        return self._tags.get(name)
+
+    def tags(self) -> list[tuple[str, dict]]:
+        """Return every (name, tag) pair, oldest first."""
+        self._load()
+        return list(self._tags.items())
+
+    def tag_index(self) -> TagIndex:
+        """
+        Return the search index over every tag, building it on first use
+        (not in _load, so routing messages never waits on it).
+        """
+        self._load()
+        if self._tag_index is None:
+            self._tag_index = TagIndex()
+            for name, tag in self._tags.items():
+                self._tag_index.add(name, tag)
+        return self._tag_index
+
+    def add_tag(self, name: str, tag: dict) -> None:
+        self._load()
+        self.storage.add_tag(name, tag)
+        self._tags[name] = tag
+        if self._tag_index is not None:
+            self._tag_index.add(name, tag)
+
+    def delete_tag(self, name: str) -> Optional[dict]:
+        """Delete the tag called <name> and return it if it existed."""
+        self._load()
+        if (self._tags.pop(name, None) is not None
+                and self._tag_index is not None):
+            self._tag_index.remove(name)
+        return self.storage.delete_tag(name)
+
+    def _route(self, message: discord.Message) -> tuple:
+        # Returns (route name, handler, handler arguments)
+        content = message.content
+
+        if content.startswith(self.prefix):
+            name = content[len(self.prefix):]
+            tag = self._tags.get(name)
+            if tag is not None:
+                return 'tag', self.on_tag, (message, name, tag)
+            return 'command', self.on_command, (message,)
+
+        if (content.endswith('?')
+                and message.channel.id in self._response_channels):
+            return 'question', self.on_question, (message,)
+
+        return 'ignored', None, ()
+
+    async def route(self, message: discord.Message) -> None:
+        start = time.perf_counter()
+        self._load()
+        route, handler, args = self._route(message)
+        self.latencies.append(time.perf_counter() - start)
+        self.routed[route] += 1
+
+        if handler:
+            await handler(*args)
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        return {
+            **self.routed,
+            'latency_p50': percentile(latencies, 0.5),
+            'latency_p95': percentile(latencies, 0.95),
+            'latency_max': latencies[-1] if latencies else 0
+        }
+
+
+router = MessageRouter(storage, prefix='b!')
@@ -0,0 +1,619 @@
+"""
+Persistent bot state: tags, osu!Goldfish account links, the autism
+leaderboard and per-channel/user config.
+
+Two backends implement the same interface:
+    - SqliteStorage: an embedded SQLite database in WAL mode where every
+      mutation is a single-row upsert (the default)
+    - JsonStorage: the original ./jsons/*.json files
+
+Select one with the STORAGE_BACKEND environment variable. The first
+time SQLite is opened with the JSON files around, they're copied into
+it (see open_storage). Running this module (python -m utils.storage
+--force) copies them in again.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from typing import Optional
+
+from env import STORAGE_BACKEND, SQLITE_PATH
+from jsons import read_json, write_json
+
+
+class Storage:
+    """Interface shared by every storage backend."""
+
+    # -----------------------------
+    #            Config
+    # -----------------------------
+    def response_channels(self) -> set[int]:
+        """Return the IDs of the channels with Ben responses enabled."""
+        raise NotImplementedError
+
+    def toggle_response_channel(self, channel_id: int) -> bool:
+        """
+        Toggle Ben responses for <channel_id> and return whether
+        they are now enabled.
+        """
+        raise NotImplementedError
+
+    def time_muted(self) -> set[int]:
+        """Return the IDs of the users who muted time pings."""
+        raise NotImplementedError
+
+    def toggle_time_muted(self, user_id: int) -> bool:
+        """
+        Toggle time pings for <user_id> and return whether
+        they are now muted.
+        """
+        raise NotImplementedError
+
+    def time_pingee(self) -> Optional[int]:
+        """Return the ID of the user who receives time pings."""
+        raise NotImplementedError
+
+    def set_time_pingee(self, user_id: int) -> None:
+        raise NotImplementedError
+
+    # -----------------------------
+    #             Tags
+    # -----------------------------
+    def get_tag(self, name: str) -> Optional[dict]:
+        """
+        Return the tag called <name>, either {'message': ...} or
+        {'filename': ...}, or None if it doesn't exist.
+        """
+        raise NotImplementedError
+
+    def tags(self) -> list[tuple[str, dict]]:
+        """Return every (name, tag) pair, oldest first."""
+        raise NotImplementedError
+
+    def add_tag(self, name: str, tag: dict) -> None:
+        raise NotImplementedError
+
+    def delete_tag(self, name: str) -> Optional[dict]:
+        """Delete the tag called <name> and return it if it existed."""
+        raise NotImplementedError
+
+    def tag_usage(self) -> dict[str, tuple[int, float]]:
+        """
+        Return how many times each tag has been used and when it was
+        last used (unix time), by tag name.
+        """
+        raise NotImplementedError
+
+    def add_tag_usage(self, usage: dict[str, tuple[int, float]]) -> None:
+        """
+        Add a batch of (uses, last used) counts, by tag name, to the
+        stored ones.
+        """
+        raise NotImplementedError
+
+    def set_tag_usage(self, usage: dict[str, tuple[int, float]]) -> None:
+        """Replace every stored (uses, last used) count with <usage>."""
+        raise NotImplementedError
+
+    # -----------------------------
+    #     osu!Goldfish accounts
+    # -----------------------------
+    def accounts(self) -> dict[str, dict]:
+        """
+        Return every account link as
+        {safe_name: {'discord_id': ..., 'email': ...}}.
+        """
+        raise NotImplementedError
+
+    def add_account(self, safe_name: str, discord_id: int, email: str) -> None:
+        raise NotImplementedError
+
+    def rename_account(self, safe_old_name: str, safe_new_name: str) -> None:
+        raise NotImplementedError
+
+    def delete_account(self, safe_name: str) -> None:
+        raise NotImplementedError
+
+    # -----------------------------
+    #       Autism leaderboard
+    # -----------------------------
+    def autism_scores(self) -> list[tuple[str, int]]:
+        """Return every (score, user_id) pair, highest score first."""
+        raise NotImplementedError
+
+    def set_autism_score(self, user_id: int, score: str) -> bool:
+        """
+        Rank <user_id> with <score> and return whether they
+        were already ranked.
+        """
+        raise NotImplementedError
+
+    def delete_autism_score(self, user_id: int) -> bool:
+        """Unrank <user_id> and return whether they were ranked."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonStorage(Storage):
+    """Storage backed by the whole-file JSON blobs in ./jsons."""
+
+    def response_channels(self) -> set[int]:
+        return set(read_json('config.json')['response_channels'])
+
+    def toggle_response_channel(self, channel_id: int) -> bool:
+        return self._toggle_config_id('response_channels', channel_id)
+
+    def time_muted(self) -> set[int]:
+        return set(read_json('config.json')['time_muted'])
+
+    def toggle_time_muted(self, user_id: int) -> bool:
+        return self._toggle_config_id('time_muted', user_id)
+
+    def _toggle_config_id(self, key: str, id_: int) -> bool:
+        config = read_json('config.json')
+
+        if id_ in config[key]:
+            config[key].remove(id_)
+        else:
+            config[key].append(id_)
+
+        write_json('config.json', config)
+        return id_ in config[key]
+
+    def time_pingee(self) -> Optional[int]:
+        return read_json('config.json').get('time_pingee')
+
+    def set_time_pingee(self, user_id: int) -> None:
+        config = read_json('config.json')
+        config['time_pingee'] = user_id
+        write_json('config.json', config)
+
+    def get_tag(self, name: str) -> Optional[dict]:
+        return read_json('tags.json').get(name)
+
+    def tags(self) -> list[tuple[str, dict]]:
+        return list(read_json('tags.json').items())
+
+    def add_tag(self, name: str, tag: dict) -> None:
+        tags = read_json('tags.json')
+        tags[name] = tag
+        write_json('tags.json', tags)
+
+    def delete_tag(self, name: str) -> Optional[dict]:
+        tags = read_json('tags.json')
+        tag = tags.pop(name, None)
+        write_json('tags.json', tags)
+
+        usage = self._read_tag_usage()
+        if usage.pop(name, None) is not None:
+            write_json('tag_usage.json', usage)
+        return tag
+
+    @staticmethod
+    def _read_tag_usage() -> dict[str, list]:
+        try:
+            return read_json('tag_usage.json')
+        except FileNotFoundError:  # no tag has been used yet
+            return {}
+
+    def tag_usage(self) -> dict[str, tuple[int, float]]:
+        return {
+            name: (uses, last_used)
+            for name, (uses, last_used) in self._read_tag_usage().items()
+        }
+
+    def add_tag_usage(self, usage: dict[str, tuple[int, float]]) -> None:
+        stored = self._read_tag_usage()
+        for name, (uses, last_used) in usage.items():
+            old_uses, old_last_used = stored.get(name, (0, 0))
+            stored[name] = [old_uses + uses, max(old_last_used, last_used)]
+        write_json('tag_usage.json', stored)
+
+    def set_tag_usage(self, usage: dict[str, tuple[int, float]]) -> None:
+        write_json('tag_usage.json', {
+            name: [uses, last_used]
+            for name, (uses, last_used) in usage.items()
+        })
+
+    def accounts(self) -> dict[str, dict]:
+        return dict(read_json('server_accs.json'))
+
+    def add_account(self, safe_name: str, discord_id: int, email: str) -> None:
+        server_accs = read_json('server_accs.json')
+        server_accs[safe_name] = {'discord_id': discord_id, 'email': email}
+        write_json('server_accs.json', server_accs)
+
+    def rename_account(self, safe_old_name: str, safe_new_name: str) -> None:
+        server_accs = read_json('server_accs.json')
+        server_accs[safe_new_name] = server_accs.pop(safe_old_name)
+        write_json('server_accs.json', server_accs)
+
+    def delete_account(self, safe_name: str) -> None:
+        server_accs = read_json('server_accs.json')
+        server_accs.pop(safe_name, None)
+        write_json('server_accs.json', server_accs)
+
+    def autism_scores(self) -> list[tuple[str, int]]:
+        lb = read_json('autismlb.json')
+        return [
+            (score, user_id)
+            for score in sorted(lb, key=int, reverse=True)
+            for user_id in lb[score]
+        ]
+
+    def set_autism_score(self, user_id: int, score: str) -> bool:
+        lb = read_json('autismlb.json')
+        is_update = self._unrank(lb, user_id)
+        lb[score] = lb.get(score, []) + [user_id]
+        write_json('autismlb.json', lb)
+        return is_update
+
+    def delete_autism_score(self, user_id: int) -> bool:
+        lb = read_json('autismlb.json')
+        if not self._unrank(lb, user_id):
+            return False
+
+        write_json('autismlb.json', lb)
+        return True
+
+    @staticmethod
+    def _unrank(lb: dict[str, list[int]], user_id: int) -> bool:
+        for score in lb:
+            if user_id in lb[score]:
+                lb[score].remove(user_id)
+                return True
+        return False
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS channel_config (
+    channel_id INTEGER PRIMARY KEY,
+    ben_responses INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS channel_config_ben_responses
+    ON channel_config (ben_responses);
+
+CREATE TABLE IF NOT EXISTS user_config (
+    user_id INTEGER PRIMARY KEY,
+    time_muted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS user_config_time_muted
+    ON user_config (time_muted);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value
+);
+
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    message TEXT,
+    filename TEXT
+);
+
+CREATE TABLE IF NOT EXISTS tag_usage (
+    name TEXT PRIMARY KEY,
+    uses INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS server_accs (
+    safe_name TEXT PRIMARY KEY,
+    discord_id INTEGER NOT NULL,
+    email TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS server_accs_discord_id
+    ON server_accs (discord_id);
+CREATE UNIQUE INDEX IF NOT EXISTS server_accs_email
+    ON server_accs (email);
+
+CREATE TABLE IF NOT EXISTS autismlb (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL UNIQUE,
+    score TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS autismlb_score
+    ON autismlb (CAST(score AS INTEGER) DESC, seq);
+'''
+
+
+class SqliteStorage(Storage):
+    """Storage backed by an embedded SQLite database in WAL mode."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def _one(self, sql: str, params=()) -> Optional[tuple]:
+        return self.conn.execute(sql, params).fetchone()
+
+    def _column(self, sql: str, params=()) -> list:
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run everything inside the block as one transaction, committed at
+        the end or rolled back on an exception. Nested blocks are part
+        of the outermost one.
+        """
+        if self.conn.in_transaction:
+            yield
+            return
+
+        self.conn.execute('BEGIN')
+        try:
+            yield
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    def json_migrated(self) -> bool:
+        """Return whether the JSON files have been copied in."""
+        return self._one(
+            "SELECT 1 FROM settings WHERE key = 'json_migrated'"
+        ) is not None
+
+    def is_empty(self) -> bool:
+        return not any(
+            self._one(f'SELECT 1 FROM {table} LIMIT 1')
+            for table in ('channel_config', 'user_config', 'settings',
+                          'tags', 'server_accs', 'autismlb')
+        )
+
+    def set_json_migrated(self) -> None:
+        self.conn.execute(
+            "INSERT OR IGNORE INTO settings (key, value) "
+            "VALUES ('json_migrated', 1)"
+        )
+
+    def response_channels(self) -> set[int]:
+        return set(self._column(
+            'SELECT channel_id FROM channel_config WHERE ben_responses = 1'
+        ))
+
+    def toggle_response_channel(self, channel_id: int) -> bool:
+        return bool(self._one(
+            'INSERT INTO channel_config (channel_id, ben_responses) '
+            'VALUES (?, 1) '
+            'ON CONFLICT (channel_id) '
+            'DO UPDATE SET ben_responses = NOT ben_responses '
+            'RETURNING ben_responses',
+            (channel_id,)
+        )[0])
+
+    def time_muted(self) -> set[int]:
+        return set(self._column(
+            'SELECT user_id FROM user_config WHERE time_muted = 1'
+        ))
+
+    def toggle_time_muted(self, user_id: int) -> bool:
+        return bool(self._one(
+            'INSERT INTO user_config (user_id, time_muted) '
+            'VALUES (?, 1) '
+            'ON CONFLICT (user_id) '
+            'DO UPDATE SET time_muted = NOT time_muted '
+            'RETURNING time_muted',
+            (user_id,)
+        )[0])
+
+    def time_pingee(self) -> Optional[int]:
+        row = self._one("SELECT value FROM settings WHERE key = 'time_pingee'")
+        return row[0] if row else None
+
+    def set_time_pingee(self, user_id: int) -> None:
+        self.conn.execute(
+            'INSERT INTO settings (key, value) '
+            "VALUES ('time_pingee', ?) "
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+            (user_id,)
+        )
+
+    @staticmethod
+    def _tag(message: Optional[str], filename: Optional[str]) -> dict:
+        if filename is not None:
+            return {'filename': filename}
+        return {'message': message}
+
+    def get_tag(self, name: str) -> Optional[dict]:
+        row = self._one(
+            'SELECT message, filename FROM tags WHERE name = ?', (name,)
+        )
+        return self._tag(*row) if row else None
+
+    def tags(self) -> list[tuple[str, dict]]:
+        return [
+            (name, self._tag(message, filename))
+            for name, message, filename in self.conn.execute(
+                'SELECT name, message, filename FROM tags ORDER BY id'
+            )
+        ]
+
+    def add_tag(self, name: str, tag: dict) -> None:
+        self.conn.execute(
+            'INSERT INTO tags (name, message, filename) VALUES (?, ?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET '
+            'message = excluded.message, filename = excluded.filename',
+            (name, tag.get('message'), tag.get('filename'))
+        )
+
+    def delete_tag(self, name: str) -> Optional[dict]:
+        row = self._one(
+            'DELETE FROM tags WHERE name = ? RETURNING message, filename',
+            (name,)
+        )
+        self.conn.execute('DELETE FROM tag_usage WHERE name = ?', (name,))
+        return self._tag(*row) if row else None
+
+    def tag_usage(self) -> dict[str, tuple[int, float]]:
+        return {
+            name: (uses, last_used)
+            for name, uses, last_used in self.conn.execute(
+                'SELECT name, uses, last_used FROM tag_usage'
+            )
+        }
+
+    def add_tag_usage(self, usage: dict[str, tuple[int, float]]) -> None:
+        # one transaction for the whole batch
+        with self.transaction():
+            self.conn.executemany(
+                'INSERT INTO tag_usage (name, uses, last_used) '
+                'VALUES (?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET '
+                'uses = uses + excluded.uses, '
+                'last_used = MAX(last_used, excluded.last_used)',
+                [(name, uses, last_used)
+                 for name, (uses, last_used) in usage.items()]
+            )
+
+    def set_tag_usage(self, usage: dict[str, tuple[int, float]]) -> None:
+        with self.transaction():
+            self.conn.execute('DELETE FROM tag_usage')
+            self.conn.executemany(
+                'INSERT INTO tag_usage (name, uses, last_used) '
+                'VALUES (?, ?, ?)',
+                [(name, uses, last_used)
+                 for name, (uses, last_used) in usage.items()]
+            )
+
+    def accounts(self) -> dict[str, dict]:
+        return {
+            safe_name: {'discord_id': discord_id, 'email': email}
+            for safe_name, discord_id, email in self.conn.execute(
+                'SELECT safe_name, discord_id, email FROM server_accs'
+            )
+        }
+
+    def add_account(self, safe_name: str, discord_id: int, email: str) -> None:
+        self.conn.execute(
+            'INSERT INTO server_accs (safe_name, discord_id, email) '
+            'VALUES (?, ?, ?) '
+            'ON CONFLICT (safe_name) DO UPDATE SET '
+            'discord_id = excluded.discord_id, email = excluded.email',
+            (safe_name, discord_id, email)
+        )
+
+    def rename_account(self, safe_old_name: str, safe_new_name: str) -> None:
+        self.conn.execute(
+            'UPDATE server_accs SET safe_name = ? WHERE safe_name = ?',
+            (safe_new_name, safe_old_name)
+        )
+
+    def delete_account(self, safe_name: str) -> None:
+        self.conn.execute(
+            'DELETE FROM server_accs WHERE safe_name = ?', (safe_name,)
+        )
+
+    def autism_scores(self) -> list[tuple[str, int]]:
+        return self.conn.execute(
+            'SELECT score, user_id FROM autismlb '
+            'ORDER BY CAST(score AS INTEGER) DESC, seq'
+        ).fetchall()
+
+    def set_autism_score(self, user_id: int, score: str) -> bool:
+        # REPLACE gives the row a new seq, so like the JSON leaderboard an
+        # updated user is listed after the others with the same score
+        is_update = self._one(
+            'SELECT 1 FROM autismlb WHERE user_id = ?', (user_id,)
+        ) is not None
+        self.conn.execute(
+            'REPLACE INTO autismlb (user_id, score) VALUES (?, ?)',
+            (user_id, score)
+        )
+        return is_update
+
+    def delete_autism_score(self, user_id: int) -> bool:
+        return self.conn.execute(
+            'DELETE FROM autismlb WHERE user_id = ?', (user_id,)
+        ).rowcount > 0
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def migrate_from_json(target: Storage, source: Storage = None) -> None:
+    """Copy everything in <source> (the JSON files by default) to <target>."""
+    source = source or JsonStorage()
+
+    for channel_id in source.response_channels():
+        if channel_id not in target.response_channels():
+            target.toggle_response_channel(channel_id)
+
+    for user_id in source.time_muted():
+        if user_id not in target.time_muted():
+            target.toggle_time_muted(user_id)
+
+    if source.time_pingee() is not None:
+        target.set_time_pingee(source.time_pingee())
+
+    for name, tag in source.tags():
+        target.add_tag(name, tag)
+    # replaced rather than added to, so copying again doesn't double them
+    target.set_tag_usage(source.tag_usage())
+
+    for safe_name, acc in source.accounts().items():
+        target.add_account(safe_name, acc['discord_id'], acc['email'])
+
+    for score, user_id in source.autism_scores():
+        target.set_autism_score(user_id, score)
+
+
+def migrate_sqlite(target: SqliteStorage) -> None:
+    """
+    Copy the JSON files into <target> as one transaction, so a failure
+    partway leaves nothing behind and the next attempt starts over.
+    """
+    with target.transaction():
+        migrate_from_json(target)
+        target.set_json_migrated()
+
+
+def open_storage(backend: str = STORAGE_BACKEND) -> Storage:
+    """Return the storage backend called <backend>."""
+    if backend == 'json':
+        return JsonStorage()
+    elif backend == 'sqlite':
+        sqlite_storage = SqliteStorage(SQLITE_PATH)
+
+        if not sqlite_storage.json_migrated():
+            if not sqlite_storage.is_empty():
+                # filled before migrations were recorded; copying again
+                # could clash with what's changed since
+                with sqlite_storage.transaction():
+                    sqlite_storage.set_json_migrated()
+            elif os.path.isdir('./jsons'):
+                # first run after switching from JSON: bring the old
+                # data along
+                migrate_sqlite(sqlite_storage)
+
+        return sqlite_storage
+
+    raise ValueError(f'Unknown storage backend: {backend}')
+
+
+storage = open_storage()
+
+
+if __name__ == '__main__':
+    # opening the storage above has already done any migration; --force
+    # copies the JSON files in again, e.g. into a database that was only
+    # partly filled before migrations were recorded
+    if not isinstance(storage, SqliteStorage):
+        print('STORAGE_BACKEND is not sqlite')
+    elif '--force' in sys.argv:
+        migrate_sqlite(storage)
+        print(f'Migrated ./jsons into {SQLITE_PATH}')
+    elif storage.json_migrated():
+        print(f'./jsons has been migrated into {SQLITE_PATH}')
+    else:
+        print('./jsons was not found, so nothing was migrated')
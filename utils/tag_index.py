@@ -0,0 +1,130 @@
+import heapq
+from collections import Counter
+
+
+def trigrams(text: str) -> set[str]:
+    """Return the trigrams of <text>, padded so short words have some."""
+    text = f'  {text.lower()} '
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ('children', 'names')
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.names: set[str] = set()  # names ending here (any case)
+
+
+class TagIndex:
+    """
+    Tag names in a prefix trie, and trigrams of tag names and messages,
+    for autocomplete and fuzzy search.
+
+    Lookups are case-insensitive. Tags must be added and removed here as
+    they're added and deleted.
+    """
+
+    def __init__(self):
+        self._root = _TrieNode()
+        self._postings: dict[str, set[str]] = {}  # trigram -> names
+        self._trigrams: dict[str, tuple[set[str], set[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._trigrams)
+
+    def add(self, name: str, tag: dict) -> None:
+        if name in self._trigrams:
+            self.remove(name)
+
+        node = self._root
+        for char in name.lower():
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        node.names.add(name)
+
+        name_trigrams = trigrams(name)
+        body_trigrams = trigrams(tag.get('message', '')) - name_trigrams
+        for trigram in name_trigrams | body_trigrams:
+            names = self._postings.get(trigram)
+            if names is None:
+                names = self._postings[trigram] = set()
+            names.add(name)
+        self._trigrams[name] = (name_trigrams, body_trigrams)
+
+    def remove(self, name: str) -> None:
+        name_trigrams, body_trigrams = self._trigrams.pop(name)
+        for trigram in name_trigrams | body_trigrams:
+            names = self._postings[trigram]
+            names.discard(name)
+            if not names:
+                del self._postings[trigram]
+
+        # prune the branches that only led to <name>
+        path = [self._root]
+        for char in name.lower():
+            path.append(path[-1].children[char])
+        path[-1].names.discard(name)
+
+        for char, parent, node in zip(reversed(name.lower()),
+                                      reversed(path[:-1]),
+                                      reversed(path[1:])):
+            if node.names or node.children:
+                break
+            del parent.children[char]
+
+    def prefix(self, prefix: str, limit: int = 25) -> list[str]:
+        """Return up to <limit> names starting with <prefix>, in order."""
+        node = self._root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        # depth-first in character order, so the results come out sorted
+        results = []
+        stack = [node]
+        while stack and len(results) < limit:
+            node = stack.pop()
+            results.extend(sorted(node.names))
+            stack.extend(node.children[char]
+                         for char in sorted(node.children, reverse=True))
+
+        return results[:limit]
+
+    def search(self, query: str, limit: int = 25) -> list[str]:
+        """
+        Return up to <limit> names of the tags that best match <query>:
+        prefix matches of the name first, then the most trigrams in
+        common, with a trigram in the name worth twice one in the message.
+        """
+        results = self.prefix(query, limit)
+        if len(results) == limit:
+            return results
+
+        query_trigrams = trigrams(query)
+        scores: Counter[str] = Counter()
+        for trigram in query_trigrams:
+            for name in self._postings.get(trigram, ()):
+                name_trigrams, _ = self._trigrams[name]
+                scores[name] += 2 if trigram in name_trigrams else 1
+
+        # at least a third of the query has to match something
+        threshold = len(query_trigrams) / 3
+        seen = set(results)
+        best = heapq.nsmallest(
+            limit - len(results),
+            (name for name, score in scores.items()
+             if score >= threshold and name not in seen),
+            key=lambda name: (-scores[name], name)
+        )
+
+        return results + best
+
+    def complete(self, current: str, limit: int = 25) -> list[str]:
+        """Return up to <limit> names to suggest for <current> input."""
+        if len(current) < 3:  # too short for trigrams to mean much
+            return self.prefix(current, limit)
+        return self.search(current, limit)
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Optional
+
+from env import TAG_USAGE_FLUSH_INTERVAL, TAG_USAGE_FLUSH_EVERY
+from utils.storage import Storage, storage
+
+
+class TagUsage:
+    """
+    How many times each tag has been used and when it was last used.
+
+    Uses are counted in memory, loaded from <storage> on first use, and
+    written back in batches: <flush_interval> seconds after the first
+    unsaved use, or as soon as <flush_every> uses are waiting, whichever
+    comes first. Recording a use never touches the disk.
+    """
+
+    def __init__(self,
+                 storage: Storage,
+                 flush_interval: float,
+                 flush_every: int):
+        self.storage = storage
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+
+        self._uses: Optional[Counter[str]] = None
+        self._last_used: dict[str, float] = {}
+        self._pending: dict[str, tuple[int, float]] = {}
+        self._pending_uses = 0
+
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_now = asyncio.Event()
+
+        self.flushes = 0
+
+    def _load(self) -> None:
+        if self._uses is None:
+            usage = self.storage.tag_usage()
+            self._uses = Counter({
+                name: uses for name, (uses, _) in usage.items()
+            })
+            self._last_used = {
+                name: last_used for name, (_, last_used) in usage.items()
+            }
+
+    def record(self, name: str) -> None:
+        """Count a use of the tag called <name>."""
+        self._load()
+        now = time.time()
+
+        self._uses[name] += 1
+        self._last_used[name] = now
+
+        uses, _ = self._pending.get(name, (0, now))
+        self._pending[name] = (uses + 1, now)
+        self._pending_uses += 1
+
+        if self._pending_uses >= self.flush_every:
+            self._flush_now.set()
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.wait_for(self._flush_now.wait(),
+                                   timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._flusher = None
+            self._flush_now.clear()
+
+        self.flush()
+
+    def flush(self) -> None:
+        """Write every unsaved use to storage now."""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        self._pending_uses = 0
+        self.storage.add_tag_usage(pending)
+        self.flushes += 1
+
+    def forget(self, name: str) -> None:
+        """Drop the counts of the deleted tag called <name>."""
+        self._load()
+        self._uses.pop(name, None)
+        self._last_used.pop(name, None)
+        self._pending_uses -= self._pending.pop(name, (0, 0))[0]
+
+    def uses(self, name: str) -> int:
+        self._load()
+        return self._uses[name]
+
+    def last_used(self, name: str) -> Optional[float]:
+        """Return when the tag called <name> was last used (unix time)."""
+        self._load()
+        return self._last_used.get(name)
+
+    def most_used(self, n: int = None) -> list[tuple[str, int]]:
+        """Return the <n> (or all) most used (name, uses), most first."""
+        self._load()
+        return self._uses.most_common(n)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'tags': len(self._uses or ()),
+            'pending': self._pending_uses,
+            'flushes': self.flushes
+        }
+
+
+tag_usage = TagUsage(
+    storage,
+    flush_interval=TAG_USAGE_FLUSH_INTERVAL,
+    flush_every=TAG_USAGE_FLUSH_EVERY
+)